@@ -1,3 +1,12 @@
 # app/__init__.py
 
-from .gui import MotionTrackingApp
+# Import preguiçoso: módulos como app.protocol podem ser usados (p.ex. pelos
+# scripts em tools/) sem carregar a GUI nem abrir a câmara/porta série.
+def __getattr__(name):
+    if name == "MotionTrackingApp":
+        from .gui import MotionTrackingApp
+        return MotionTrackingApp
+    if name == "TrackingEngine":
+        from .engine import TrackingEngine
+        return TrackingEngine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,172 @@
+# app/calibration.py
+
+import os
+
+import numpy as np
+from PyQt5.QtCore import QTimer
+
+from .detection import detect_red_dot
+
+DEFAULT_MAP_PATH = "pixel_servo_map.npz"
+
+def _poly_terms(x, y, degree):
+    # Termos x^i * y^j com i + j <= degree, em coordenadas normalizadas
+    return np.stack([x ** i * y ** j
+                     for i in range(degree + 1)
+                     for j in range(degree + 1 - i)], axis=-1)
+
+class PixelServoMap:
+    # Mapeamento denso píxel -> (servo_x, servo_y) obtido do varrimento do
+    # laser. Guarda o polinómio ajustado e uma LUT (h, w, 2) avaliada a partir
+    # dele, para o tracking fazer lookups O(1) sem iterar até convergir.
+    def __init__(self, coeffs, degree, image_size, samples=None):
+        self.coeffs = np.asarray(coeffs, dtype=np.float64)
+        self.degree = int(degree)
+        self.image_size = tuple(int(v) for v in image_size)
+        self.samples = None if samples is None else np.asarray(samples, dtype=np.float64)
+        self._build_lut()
+
+    @classmethod
+    def fit(cls, samples, image_size, degree=3):
+        # samples: (N, 4) com px, py, servo_x, servo_y
+        samples = np.asarray(samples, dtype=np.float64)
+        n_terms = (degree + 1) * (degree + 2) // 2
+        while degree > 1 and len(samples) < n_terms + 2:
+            degree -= 1
+            n_terms = (degree + 1) * (degree + 2) // 2
+        if len(samples) < n_terms:
+            raise ValueError(f"Pontos de calibração insuficientes: {len(samples)}")
+
+        w, h = image_size
+        A = _poly_terms(samples[:, 0] / w, samples[:, 1] / h, degree)
+        coeffs, _, _, _ = np.linalg.lstsq(A, samples[:, 2:4], rcond=None)
+        return cls(coeffs, degree, image_size, samples)
+
+    def _build_lut(self):
+        w, h = self.image_size
+        xs, ys = np.meshgrid(np.arange(w) / w, np.arange(h) / h)
+        lut = _poly_terms(xs, ys, self.degree) @ self.coeffs
+        self.lut = np.clip(lut, 0, 180).astype(np.float32)
+
+    def evaluate(self, x, y):
+        # Avaliação direta do polinómio (sub-píxel)
+        w, h = self.image_size
+        terms = _poly_terms(np.float64(x) / w, np.float64(y) / h, self.degree)
+        servo_x, servo_y = np.clip(terms @ self.coeffs, 0, 180)
+        return float(servo_x), float(servo_y)
+
+    def lookup(self, x, y):
+        w, h = self.image_size
+        col = min(max(int(round(x)), 0), w - 1)
+        row = min(max(int(round(y)), 0), h - 1)
+        servo_x, servo_y = self.lut[row, col]
+        return float(servo_x), float(servo_y)
+
+    def residuals(self):
+        # Erro (graus) do ajuste em cada ponto medido
+        if self.samples is None:
+            return None
+        predicted = np.array([self.evaluate(px, py) for px, py in self.samples[:, :2]])
+        return np.hypot(*(predicted - self.samples[:, 2:4]).T)
+
+    def save(self, path=DEFAULT_MAP_PATH):
+        np.savez(path, coeffs=self.coeffs, degree=self.degree,
+                 image_size=np.array(self.image_size), lut=self.lut,
+                 samples=self.samples if self.samples is not None else np.empty((0, 4)))
+
+    @classmethod
+    def load(cls, path=DEFAULT_MAP_PATH):
+        data = np.load(path)
+        samples = data["samples"] if len(data["samples"]) else None
+        return cls(data["coeffs"], data["degree"], data["image_size"], samples)
+
+    @classmethod
+    def load_if_exists(cls, path=DEFAULT_MAP_PATH):
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls.load(path)
+        except Exception as e:
+            print(f"Erro ao carregar mapa de calibração: {e}")
+            return None
+
+class CalibrationSweep:
+    # Varrimento automático: leva os servos a cada ponto de uma grelha, espera
+    # que estabilizem, deteta o laser e no fim ajusta e grava o PixelServoMap.
+    # Corre num QTimer, sem bloquear a GUI.
+    def __init__(self, camera, move_servos, finish_callback,
+                 x_range=(60, 120), y_range=(60, 120), grid=(7, 5),
+                 settle_ms=400, attempts=3, degree=3, path=DEFAULT_MAP_PATH):
+        self.camera = camera
+        self.move_servos = move_servos
+        self.finish_callback = finish_callback
+        self.settle_ms = settle_ms
+        self.attempts = attempts
+        self.degree = degree
+        self.path = path
+
+        xs = np.linspace(x_range[0], x_range[1], grid[0]).round().astype(int)
+        ys = np.linspace(y_range[0], y_range[1], grid[1]).round().astype(int)
+        # Percurso em serpentina para os servos andarem pouco entre pontos
+        self.points = [(int(x), int(y))
+                       for j, y in enumerate(ys)
+                       for x in (xs if j % 2 == 0 else xs[::-1])]
+
+        self.samples = []
+        self.index = 0
+        self.tries = 0
+        self.image_size = None
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._measure)
+
+    @property
+    def progress(self):
+        return self.index, len(self.points)
+
+    def start(self):
+        self.samples = []
+        self.index = 0
+        self._go_to_point()
+
+    def stop(self):
+        self.timer.stop()
+
+    def _go_to_point(self):
+        self.tries = 0
+        self.move_servos(*self.points[self.index])
+        self.timer.start(self.settle_ms)
+
+    def _measure(self):
+        frame = self.camera.get_latest_frame()
+        pos_x = pos_y = None
+        if frame is not None:
+            self.image_size = (frame.shape[1], frame.shape[0])
+            pos_x, pos_y = detect_red_dot(frame)
+
+        if pos_x is None:
+            self.tries += 1
+            if self.tries < self.attempts:
+                self.timer.start(50)
+                return
+            print(f"Aviso: laser não encontrado no ponto {self.points[self.index]}")
+        else:
+            servo_x, servo_y = self.points[self.index]
+            self.samples.append((pos_x, pos_y, servo_x, servo_y))
+
+        self.index += 1
+        if self.index < len(self.points):
+            self._go_to_point()
+        else:
+            self._finish()
+
+    def _finish(self):
+        try:
+            mapping = PixelServoMap.fit(self.samples, self.image_size, self.degree)
+        except (ValueError, TypeError) as e:
+            print(f"Erro na calibração: {e}")
+            self.finish_callback(None)
+            return
+        mapping.save(self.path)
+        print(f"Calibração: {len(self.samples)} pontos, erro máximo {mapping.residuals().max():.2f} graus")
+        self.finish_callback(mapping)
@@ -1,27 +1,143 @@
 # app/camera.py
 
-import cv2
+import threading
+import time
+from collections import deque
+
 from picamera2 import Picamera2
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtGui import QImage
 
 class CameraManager:
-    def __init__(self, resolution=(640, 480)):
+    def __init__(self, resolution=(640, 480), threaded=False, ring_size=3,
+                 mode="still", fps=30, buffer_count=4, lores_size=None):
         self.picam2 = Picamera2()
-        self.picam2.configure(
-            self.picam2.create_still_configuration({"size": resolution})
-        )
+        self.mode = mode
+        self.lores_size = lores_size if mode == "video" else None
+
+        if mode == "video":
+            # Configuração de vídeo: menos latência por captura que a de still.
+            # O stream "lores" (YUV420) é usado só para a deteção.
+            frame_duration = int(1_000_000 / fps)
+            config_kwargs = {
+                "main": {"size": resolution, "format": "BGR888"},
+                "buffer_count": buffer_count,
+                "controls": {"FrameDurationLimits": (frame_duration, frame_duration)},
+            }
+            if lores_size is not None:
+                config_kwargs["lores"] = {"size": lores_size, "format": "YUV420"}
+            config = self.picam2.create_video_configuration(**config_kwargs)
+        else:
+            config = self.picam2.create_still_configuration({"size": resolution})
+
+        self.picam2.configure(config)
         self.picam2.start()
+        self.last_lores = None
+        self.last_timestamp = None
 
-    def get_frame(self):
+        # Modo threaded: uma thread de captura enche um ring buffer com os
+        # frames mais recentes e get_frame() nunca bloqueia no picam2.
+        self.threaded = threaded
+        self.ring = deque(maxlen=ring_size)
+        self.frame_lock = threading.Lock()
+        self.frame_seq = 0
+        self.last_read_seq = 0
+        self.dropped_frames = 0
+        self.capture_thread = None
+        self.running = False
+
+        if threaded:
+            self.start_capture_thread()
+
+    # ========== CAPTURE THREAD ==========
+
+    def start_capture_thread(self):
+        if self.capture_thread is not None:
+            return
+        self.running = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+
+    def stop_capture_thread(self):
+        self.running = False
+        if self.capture_thread is not None:
+            self.capture_thread.join(timeout=1)
+            self.capture_thread = None
+
+    def _capture_loop(self):
+        # Numa falha (câmara desligada, erro do picam2) espera antes de tentar
+        # de novo, com o tempo a duplicar até 1 s, em vez de rodar a 100% de CPU
+        backoff = 0.0
+        while self.running:
+            frame, lores = self._capture()
+            if frame is None:
+                backoff = min(1.0, backoff * 2 or 0.01)
+                time.sleep(backoff)
+                continue
+            backoff = 0.0
+            timestamp = time.monotonic()
+            with self.frame_lock:
+                self.frame_seq += 1
+                self.ring.append((self.frame_seq, frame, lores, timestamp))
+
+    def _capture(self):
         try:
-            return self.picam2.capture_array()
+            if self.lores_size is not None:
+                # main e lores vêm do mesmo request, por isso estão sincronizados
+                (frame, lores), _ = self.picam2.capture_arrays(["main", "lores"])
+                return frame, lores
+            return self.picam2.capture_array(), None
         except Exception as e:
             print(f"Erro ao capturar frame: {e}")
+            return None, None
+
+    # ========== FRAME ACCESS ==========
+
+    def get_frame(self):
+        if not self.threaded:
+            frame, self.last_lores = self._capture()
+            self.last_timestamp = time.monotonic()
+            return frame
+
+        with self.frame_lock:
+            if not self.ring:
+                return None
+            seq, frame, lores, timestamp = self.ring[-1]
+            if seq == self.last_read_seq:
+                return None  # ainda não chegou frame novo
+            # Frames que foram capturados mas nunca lidos contam como descartados
+            self.dropped_frames += seq - self.last_read_seq - 1
+            self.last_read_seq = seq
+        self.last_lores = lores
+        self.last_timestamp = timestamp
+        return frame
+
+    def get_latest_frame(self):
+        # Para consumidores secundários (calibração): devolve sempre o frame
+        # mais recente, sem mexer na contagem de frames novos/descartados que
+        # pertence ao loop principal
+        if not self.threaded:
+            frame, _ = self._capture()
+            return frame
+        with self.frame_lock:
+            return self.ring[-1][1] if self.ring else None
+
+    def get_luma(self):
+        # Vista sem cópia do plano Y do frame lores: num buffer YUV420 as
+        # primeiras `altura` linhas são a luminância, que já é a imagem em
+        # cinzento que a deteção precisa. O slice de colunas remove o padding
+        # do stride, se existir.
+        if self.last_lores is None:
             return None
+        w, h = self.lores_size
+        return self.last_lores[:h, :w]
+
+    def stop(self):
+        self.stop_capture_thread()
+        self.picam2.stop()
 
     def to_qt_image(self, frame):
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-        return QPixmap.fromImage(qt_image)
+        # QImage que aponta para o próprio frame (sem cvtColor nem cópia); o
+        # frame tem de viver tanto quanto o QImage. Para o preview usar o
+        # VideoWidget, que reaproveita um único buffer.
+        h, w, ch = frame.shape
+        return QImage(frame.data, w, h, ch * w, QImage.Format.Format_BGR888)
@@ -0,0 +1,155 @@
+# app/camera_model.py
+
+import math
+import os
+
+import cv2
+import numpy as np
+
+# FOV da Pi Camera v1 usado em G8_Enes_Funcional_08_shot.py
+DEFAULT_FOV = (53.5, 41.41)
+DEFAULT_MODEL_PATH = "camera_model.npz"
+
+class CameraModel:
+    # Modelo pinhole + distorção que converte píxeis em ângulos pan/tilt.
+    #
+    # No arranque são pré-calculadas duas tabelas:
+    #  - map1/map2 para cv2.remap (imagem sem distorção)
+    #  - angle_lut (h, w, 2): ângulos pan/tilt em graus de cada píxel da imagem
+    #    original (já com a distorção corrigida), para conversão O(1)
+    #
+    # Os ângulos de servo são boresight + ângulo (com sinal por eixo). O
+    # boresight é o ângulo do servo que aponta para o centro da imagem; o sinal
+    # invertido corresponde ao mapeamento `180 - ângulo` do código antigo.
+    def __init__(self, camera_matrix, dist_coeffs, image_size, boresight=(90.0, 90.0),
+                 invert_x=True, invert_y=True):
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).reshape(-1)
+        self.image_size = tuple(int(v) for v in image_size)
+        self.boresight = tuple(float(v) for v in boresight)
+        self.invert_x = invert_x
+        self.invert_y = invert_y
+        self._build_luts()
+
+    # ========== CONSTRUCTION ==========
+
+    @classmethod
+    def from_fov(cls, image_size, hfov=DEFAULT_FOV[0], vfov=DEFAULT_FOV[1], **kwargs):
+        w, h = image_size
+        fx = (w / 2) / math.tan(math.radians(hfov) / 2)
+        fy = (h / 2) / math.tan(math.radians(vfov) / 2)
+        camera_matrix = [[fx, 0, (w - 1) / 2],
+                         [0, fy, (h - 1) / 2],
+                         [0, 0, 1]]
+        return cls(camera_matrix, np.zeros(5), image_size, **kwargs)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(
+            data["camera_matrix"], data["dist_coeffs"], data["image_size"],
+            boresight=data["boresight"],
+            invert_x=bool(data["invert_x"]), invert_y=bool(data["invert_y"])
+        )
+
+    @classmethod
+    def load_or_default(cls, path, image_size):
+        if path and os.path.exists(path):
+            try:
+                return cls.load(path).scaled(image_size)
+            except Exception as e:
+                print(f"Erro ao carregar modelo da câmara: {e}")
+        return cls.from_fov(image_size)
+
+    def save(self, path):
+        np.savez(
+            path,
+            camera_matrix=self.camera_matrix, dist_coeffs=self.dist_coeffs,
+            image_size=np.array(self.image_size), boresight=np.array(self.boresight),
+            invert_x=self.invert_x, invert_y=self.invert_y
+        )
+
+    def scaled(self, image_size):
+        # Mesmo modelo para outra resolução (a distorção não depende da escala)
+        if tuple(image_size) == self.image_size:
+            return self
+        sx = image_size[0] / self.image_size[0]
+        sy = image_size[1] / self.image_size[1]
+        camera_matrix = self.camera_matrix.copy()
+        camera_matrix[0] *= sx
+        camera_matrix[1] *= sy
+        return CameraModel(camera_matrix, self.dist_coeffs, image_size, self.boresight,
+                           self.invert_x, self.invert_y)
+
+    # ========== LOOKUP TABLES ==========
+
+    def _build_luts(self):
+        w, h = self.image_size
+        self.map1, self.map2 = cv2.initUndistortRectifyMap(
+            self.camera_matrix, self.dist_coeffs, None, self.camera_matrix,
+            (w, h), cv2.CV_16SC2
+        )
+
+        xs, ys = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+        pixels = np.stack([xs, ys], axis=-1).reshape(-1, 1, 2)
+        # Coordenadas normalizadas (x/z, y/z) já sem distorção
+        normalized = cv2.undistortPoints(pixels, self.camera_matrix, self.dist_coeffs).reshape(h, w, 2)
+
+        xn = normalized[..., 0]
+        yn = normalized[..., 1]
+        pan = np.degrees(np.arctan(xn))
+        # Tilt medido depois do pan (gimbal pan-tilt)
+        tilt = np.degrees(np.arctan2(yn, np.sqrt(1 + xn * xn)))
+        self.angle_lut = np.stack([pan, tilt], axis=-1).astype(np.float32)
+
+    # ========== CONVERSIONS ==========
+
+    def undistort(self, frame):
+        return cv2.remap(frame, self.map1, self.map2, cv2.INTER_LINEAR)
+
+    def pixel_to_angles(self, x, y):
+        # Ângulos (graus) do píxel relativamente ao eixo ótico
+        w, h = self.image_size
+        col = min(max(int(round(x)), 0), w - 1)
+        row = min(max(int(round(y)), 0), h - 1)
+        pan, tilt = self.angle_lut[row, col]
+        return float(pan), float(tilt)
+
+    def pixel_to_servo(self, x, y):
+        pan, tilt = self.pixel_to_angles(x, y)
+        servo_x = self.boresight[0] + (-pan if self.invert_x else pan)
+        servo_y = self.boresight[1] + (-tilt if self.invert_y else tilt)
+        return max(0.0, min(180.0, servo_x)), max(0.0, min(180.0, servo_y))
+
+# ========== CHESSBOARD CALIBRATION ==========
+
+def find_chessboard(gray, pattern_size):
+    found, corners = cv2.findChessboardCorners(gray, pattern_size, None)
+    if not found:
+        return None
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    return cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+
+def calibrate_chessboard(frames, pattern_size=(9, 6), square_size=1.0, **kwargs):
+    # `frames` são imagens (BGR ou cinzento) do mesmo tabuleiro em várias
+    # posições. Devolve (CameraModel, erro RMS de reprojeção em píxeis).
+    object_grid = np.zeros((pattern_size[0] * pattern_size[1], 3), np.float32)
+    object_grid[:, :2] = np.mgrid[0:pattern_size[0], 0:pattern_size[1]].T.reshape(-1, 2) * square_size
+
+    object_points, image_points = [], []
+    image_size = None
+    for frame in frames:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        image_size = (gray.shape[1], gray.shape[0])
+        corners = find_chessboard(gray, pattern_size)
+        if corners is not None:
+            object_points.append(object_grid)
+            image_points.append(corners)
+
+    if len(image_points) < 3:
+        raise ValueError(f"Tabuleiro encontrado em só {len(image_points)} imagens (mínimo 3)")
+
+    rms, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(
+        object_points, image_points, image_size, None, None
+    )
+    return CameraModel(camera_matrix, dist_coeffs, image_size, **kwargs), rms
@@ -1,43 +1,82 @@
 # app/control.py
 
-import serial
 from PyQt5.QtCore import QTimer
 
-try:
-    ser = serial.Serial('/dev/ttyACM0', 9600, timeout=1)
-except serial.SerialException:
-    print("Erro: não foi possível abrir a porta serial")
-    ser = None
+from .protocol import encode_step, encode_calibrate
+from .serial_link import open_serial
+from .serial_worker import SerialWorker
+from .trajectory import TrajectoryStreamer
+
+SERIAL_PORT = '/dev/ttyACM0'
+BAUDRATE = 9600          # taxa com que o firmware arranca
+MAX_BAUDRATE = 500000    # maior taxa a negociar no arranque (None para não negociar)
+
+# Movimentos suaves: com o perfil no firmware o host só envia o alvo e os
+# limites; sem ele, o TrajectoryStreamer envia os passos intermédios
+USE_FIRMWARE_PROFILE = True
+SERVO_MAX_ACCEL = 400    # graus/s²
+
+# Toda a I/O da porta passa pela thread do worker; estas funções só
+# submetem comandos e nunca bloqueiam na UART. Importar o módulo não abre a
+# porta: quem arranca a aplicação chama connect_serial() e entrega o worker
+# ao TrackingEngine, que o liga aqui com set_serial_worker().
+ser = None
+worker = None
+last_position_seq = 0
+
+def connect_serial(port=SERIAL_PORT, baudrate=BAUDRATE, max_baudrate=MAX_BAUDRATE):
+    # Abre a porta (negociando a taxa) e devolve o SerialWorker dono dela, ou None
+    link = open_serial(port, baudrate, max_baudrate)
+    return SerialWorker(link) if link else None
+
+def set_serial_worker(serial_worker):
+    global ser, worker, last_position_seq
+    worker = serial_worker
+    ser = serial_worker.ser if serial_worker else None
+    last_position_seq = 0
+
+def serial_transmit_time(nbytes):
+    # Tempo no fio para `nbytes` (8N1 = 10 bits por byte) à taxa atual
+    return nbytes * 10 / ser.baudrate if ser else 0.0
 
 # ========== BASIC SERIAL COMMANDS ==========
 
 def send_commands(data):
-    if ser:
-        ser.write(f"{str(data)}\n".encode())
+    # data = (x, y, disparo), com o mesmo significado do antigo "[x,y,z]"
+    if worker:
+        worker.submit(encode_step(*data))
 
-def update_servo(axis, value):
-    if ser:
-        ser.write(f"SERVO{axis.upper()}:{value}\n".encode())
+def update_servo(axis, value, max_velocity=None, max_accel=None):
+    # Sem limites o servo salta para `value`; com max_velocity (graus/s) e
+    # max_accel (graus/s²) o Arduino faz um perfil trapezoidal até lá
+    if worker:
+        worker.submit_servo(axis, value, max_velocity, max_accel)
 
 def calibrate_motors():
-    if ser:
-        ser.write(b"CALIBRAR\n")
+    if worker:
+        worker.submit(encode_calibrate())
+
+def close_serial(serial_worker):
+    if serial_worker:
+        serial_worker.stop()
+        serial_worker.ser.close()
 
 def trigger_fire_command():
-    send_commands("[0,0,1]")
+    send_commands((0, 0, 1))
 
 # ========== SERIAL FEEDBACK (POSITION FROM ARDUINO) ==========
 
 def read_serial_feedback(callback_x, callback_y):
-    if ser and ser.in_waiting:
-        try:
-            line = ser.readline().decode('utf-8').strip()
-            if line.startswith("POS:"):
-                _, x, y = line.split(":")
-                callback_x(int(x))
-                callback_y(int(y))
-        except Exception as e:
-            print(f"Erro ao ler da serial: {e}")
+    global last_position_seq
+    if not worker:
+        return
+    seq, position = worker.get_position()
+    if position is None or seq == last_position_seq:
+        return
+    last_position_seq = seq
+    x, y = position
+    callback_x(x)
+    callback_y(y)
 
 # ========== EASTER EGG MOVEMENT (YES/NO) ==========
 
@@ -48,47 +87,52 @@ def perform_motion_sequence(axis, base_val, delay, repetitions, amplitude):
     def sequence(i):
         if i >= repetitions:
             return
-        if ser:
-            if axis == 'y':
-                ser.write(f"SERVOY:{plus}\n".encode())
-                QTimer.singleShot(delay, lambda: ser.write(f"SERVOY:{minus}\n".encode()))
-                QTimer.singleShot(2 * delay, lambda: ser.write(f"SERVOY:{base_val}\n".encode()))
-            else:
-                ser.write(f"SERVOX:{plus}\n".encode())
-                QTimer.singleShot(delay, lambda: ser.write(f"SERVOX:{minus}\n".encode()))
-                QTimer.singleShot(2 * delay, lambda: ser.write(f"SERVOX:{base_val}\n".encode()))
+        if worker:
+            update_servo(axis, plus)
+            QTimer.singleShot(delay, lambda: update_servo(axis, minus))
+            QTimer.singleShot(2 * delay, lambda: update_servo(axis, base_val))
         QTimer.singleShot(3 * delay, lambda: sequence(i + 1))
 
     sequence(0)
 
 # ========== GRADUAL SERVO MOVEMENT ==========
 
+streamer = TrajectoryStreamer(update_servo)
+
 def move_servo_gradually(axis, current_val, target_val, step=2, delay=30):
-    steps = []
-    if target_val > current_val:
-        steps = list(range(current_val, target_val + 1, step))
-    else:
-        steps = list(range(current_val, target_val - 1, -step))
+    if USE_FIRMWARE_PROFILE:
+        # Mesma velocidade média que os passos de `step` graus a cada `delay` ms
+        update_servo(axis, target_val, max_velocity=step * 1000 / delay, max_accel=SERVO_MAX_ACCEL)
+        return
 
-    for i, val in enumerate(steps):
-        QTimer.singleShot(i * delay, lambda v=val: update_servo(axis, v))
+    # Substitui o alvo do eixo no streamer em vez de agendar um timer por passo
+    streamer.set_rate(delay, step)
+    streamer.set_target(axis, target_val, current_val)
 
 # ========== CALIBRATION LOOP STEP ==========
 
-def start_calibration_step(camera, get_slider_vals, set_slider_vals, finish_callback, tolerancia=1, Kx=0.1, Ky=0.1):
-    frame = camera.get_frame()
+def start_calibration_step(camera, get_slider_vals, set_slider_vals, finish_callback, tolerancia=1, Kx=0.1, Ky=0.1,
+                           dot_tracker=None, min_confidence=0.3, max_misses=25):
+    # finish_callback(True) quando o laser chega ao centro (ou a correção que
+    # falta é menor do que a resolução de 1 grau dos servos); finish_callback(False)
+    # ao fim de max_misses frames seguidos sem laser (só com dot_tracker)
+    frame = camera.get_latest_frame()
     if frame is None:
         return None, None, None
 
     altura, comprimento, _ = frame.shape
-    center_x = comprimento // 2
-    center_y = altura // 2
-
-    from .detection import detect_red_dot
-    pos_x, pos_y = detect_red_dot(frame)
-
-    if pos_x is None or pos_y is None:
-        print("Erro: laser não encontrado")
+    center_x = (comprimento - 1) / 2
+    center_y = (altura - 1) / 2
+
+    from .detection import locate_red_dot
+    # Com um RedDotTracker só se procura numa janela à volta da última posição
+    pos_x, pos_y, confidence = dot_tracker.locate(frame) if dot_tracker else locate_red_dot(frame)
+
+    if pos_x is None or confidence < min_confidence:
+        # Frame sem laser fiável: não mexer os servos com base nele
+        if dot_tracker and dot_tracker.misses >= max_misses:
+            print("Erro: laser não encontrado, calibração interrompida")
+            finish_callback(False)
         return frame, pos_x, pos_y
 
     current_x, current_y = get_slider_vals()
@@ -96,15 +140,21 @@ def start_calibration_step(camera, get_slider_vals, set_slider_vals, finish_call
     error_x = pos_x - center_x
     error_y = pos_y - center_y
 
-    target_x = max(0, min(180, current_x + int(Kx * error_x)))
-    target_y = max(0, min(180, current_y + int(Ky * error_y)))
+    # Arredondar (e não truncar) a correção: com int() erros abaixo de 1/K
+    # píxeis davam passo 0 e a calibração nunca terminava
+    step_x = int(round(Kx * error_x))
+    step_y = int(round(Ky * error_y))
+
+    if (abs(error_x) < tolerancia and abs(error_y) < tolerancia) or (step_x == 0 and step_y == 0):
+        finish_callback(True)
+        return frame, pos_x, pos_y
+
+    target_x = max(0, min(180, current_x + step_x))
+    target_y = max(0, min(180, current_y + step_y))
 
     move_servo_gradually('x', current_x, target_x)
     move_servo_gradually('y', current_y, target_y)
 
     set_slider_vals(target_x, target_y)
 
-    if abs(error_x) < tolerancia and abs(error_y) < tolerancia:
-        finish_callback()
-
-    return frame, pos_x, pos_y
\ No newline at end of file
+    return frame, pos_x, pos_y
@@ -0,0 +1,138 @@
+# app/controller.py
+
+import time
+
+from PyQt5.QtCore import QTimer
+
+class PIDController:
+    # PID de um eixo. A entrada é o erro em píxeis e a saída uma velocidade
+    # angular (graus/s) que o PanTiltController integra na posição do servo.
+    #  - derivada do erro filtrada por um passa-baixo de 1ª ordem com
+    #    constante `derivative_tau` (o setpoint é fixo no centro da imagem)
+    #  - `deadband` em píxeis: erros menores contam como zero
+    #  - `max_rate` limita a saída (graus/s)
+    #  - anti-windup: o integral só acumula quando a saída não está saturada
+    # Os ganhos por omissão vêm de tools/bench_pid_step.py (degrau com ~12
+    # px/grau, 30 fps e 40-80 ms de latência): estabilizam sem oscilar.
+    def __init__(self, kp=0.6, ki=0.1, kd=0.0, deadband=3, max_rate=120.0,
+                 derivative_tau=0.05, integral_limit=60.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.deadband = deadband
+        self.max_rate = max_rate
+        self.derivative_tau = derivative_tau
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def configure(self, **params):
+        for name, value in params.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Parâmetro PID desconhecido: {name}")
+            setattr(self, name, value)
+
+    def reset(self):
+        self.integral = 0.0
+        self.derivative = 0.0
+        self.previous_error = None
+        self.saturated = False
+
+    def update(self, error, dt, hold_integral=False):
+        if abs(error) < self.deadband:
+            error = 0.0
+
+        if self.previous_error is not None and dt > 0:
+            raw_derivative = (error - self.previous_error) / dt
+            alpha = dt / (self.derivative_tau + dt)
+            self.derivative += alpha * (raw_derivative - self.derivative)
+        self.previous_error = error
+
+        # Anti-windup condicional: não integrar se a saída anterior saturou no
+        # mesmo sentido do erro, ou se o atuador chegou ao limite (hold_integral)
+        pushing_saturation = self.saturated and (error * self.integral > 0)
+        if not pushing_saturation and not hold_integral:
+            self.integral += error * dt
+            self.integral = max(-self.integral_limit, min(self.integral_limit, self.integral))
+
+        output = self.kp * error + self.ki * self.integral + self.kd * self.derivative
+        limited = max(-self.max_rate, min(self.max_rate, output))
+        self.saturated = limited != output
+        return limited
+
+class PanTiltController:
+    # Malha de controlo dos dois servos a uma taxa fixa, independente do frame
+    # rate. O tracker só publica o erro mais recente (set_error); o timer do
+    # controlador integra a saída dos PIDs e envia o novo ângulo com `send`.
+    def __init__(self, send, rate_hz=50, max_error_age=0.3, initial=(90, 90),
+                 invert_x=False, invert_y=False):
+        self.send = send
+        self.rate_hz = rate_hz
+        self.max_error_age = max_error_age
+        self.axes = {'x': PIDController(), 'y': PIDController()}
+        self.positions = {'x': float(initial[0]), 'y': float(initial[1])}
+        self.sent = {'x': None, 'y': None}
+        self.signs = {'x': -1 if invert_x else 1, 'y': -1 if invert_y else 1}
+        self.errors = None
+        self.error_time = 0.0
+        self.last_tick = None
+        self.timer = None
+
+    def configure(self, axis=None, **params):
+        for name in ('x', 'y') if axis is None else (axis,):
+            self.axes[name].configure(**params)
+
+    def set_rate(self, rate_hz):
+        self.rate_hz = rate_hz
+        if self.timer is not None and self.timer.isActive():
+            self.timer.start(int(1000 / rate_hz))
+
+    def is_active(self):
+        return self.timer is not None and self.timer.isActive()
+
+    def set_position(self, axis, value):
+        # Posição atual conhecida de fora (slider, feedback do Arduino)
+        self.positions[axis] = float(value)
+        self.sent[axis] = None
+
+    def set_error(self, error_x, error_y, timestamp=None):
+        self.errors = {'x': error_x, 'y': error_y}
+        self.error_time = time.monotonic() if timestamp is None else timestamp
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.timeout.connect(self.tick)
+        if not self.timer.isActive():
+            self.last_tick = None
+            self.timer.start(int(1000 / self.rate_hz))
+
+    def clear_error(self):
+        self.errors = None
+        for pid in self.axes.values():
+            pid.reset()
+
+    def stop(self):
+        self.clear_error()
+        if self.timer is not None:
+            self.timer.stop()
+
+    def tick(self):
+        now = time.monotonic()
+        dt = 1.0 / self.rate_hz if self.last_tick is None else now - self.last_tick
+        self.last_tick = now
+
+        # Erro demasiado antigo (alvo perdido): manter posição
+        if self.errors is None or now - self.error_time > self.max_error_age:
+            self.stop()
+            return
+
+        for axis, pid in self.axes.items():
+            position = self.positions[axis]
+            direction = self.signs[axis] * self.errors[axis]
+            at_limit = (position <= 0 and direction < 0) or (position >= 180 and direction > 0)
+            rate = pid.update(self.errors[axis], dt, hold_integral=at_limit)
+            position = max(0.0, min(180.0, position + self.signs[axis] * rate * dt))
+            self.positions[axis] = position
+
+            angle = int(round(position))
+            if angle != self.sent[axis]:
+                self.sent[axis] = angle
+                self.send(axis, angle)
@@ -3,47 +3,438 @@
 import cv2
 import numpy as np
 
-def detect_red_dot(frame):
-    hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
+# ========== RED DOT (LASER) ==========
+
+# O vermelho fica nas duas pontas do círculo de hue do OpenCV (0-10 e
+# 170-180). Convertendo o frame RGB como se fosse BGR (R e B trocados) o hue
+# passa a 120 - h e o vermelho fica contínuo em 110-130: basta um inRange,
+# sem LUT nem bitwise_or. S e V não mudam; nas fronteiras (hue 10/11 e
+# 169/170) o arredondamento pode diferir de uma unidade.
+RED_LOWER = np.array([110, 120, 70])
+RED_UPPER = np.array([130, 255, 255])
 
-    lower_red1 = np.array([0, 120, 70])
-    upper_red1 = np.array([10, 255, 255])
-    lower_red2 = np.array([170, 120, 70])
-    upper_red2 = np.array([180, 255, 255])
+def _red_hsv(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
 
-    mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-    mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-    mask = cv2.bitwise_or(mask1, mask2)
+# Tamanho esperado do ponto do laser, em píxeis: blobs fora deste intervalo
+# perdem confiança proporcionalmente (objetos vermelhos grandes ficam perto de 0)
+RED_DOT_MIN_AREA = 6
+RED_DOT_MAX_AREA = 400
+
+def locate_red_dot(frame):
+    # Centroide sub-píxel do maior blob vermelho, pesado pelo brilho (V), e
+    # uma confiança entre 0 e 1. A confiança junta:
+    #  - dominância: fração dos píxeis vermelhos da imagem que estão no blob
+    #  - circularidade 4*pi*A/P^2 do contorno (1 num círculo, ~0.4 numa
+    #    barra 6:1), que ao contrário de área/boundingRect não dá 1 a retângulos
+    #  - brilho médio do blob (o laser satura, reflexos vermelhos não)
+    #  - tamanho: fora de [RED_DOT_MIN_AREA, RED_DOT_MAX_AREA] é pouco fiável
+    hsv = _red_hsv(frame)
+    mask = cv2.inRange(hsv, RED_LOWER, RED_UPPER)
 
     contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     if not contours:
-        return None, None
+        return None, None, 0.0
+
+    areas = [cv2.contourArea(c) for c in contours]
+    largest = int(np.argmax(areas))
+    x, y, w, h = cv2.boundingRect(contours[largest])
+
+    # Blob preenchido: o centro saturado (quase branco) do laser também conta
+    blob = np.zeros((h, w), np.uint8)
+    cv2.drawContours(blob, contours, largest, 255, cv2.FILLED, offset=(-x, -y))
+    weights = cv2.bitwise_and(hsv[y:y + h, x:x + w, 2], blob)
+
+    m = cv2.moments(weights)
+    if m["m00"] <= 0:
+        return None, None, 0.0
+
+    center_x = x + m["m10"] / m["m00"]
+    center_y = y + m["m01"] / m["m00"]
 
-    largest_contour = max(contours, key=cv2.contourArea)
-    x, y, w, h = cv2.boundingRect(largest_contour)
-    center_x = x + w // 2
-    center_y = y + h // 2
+    area = cv2.countNonZero(blob)
+    dominance = cv2.countNonZero(cv2.bitwise_and(mask[y:y + h, x:x + w], blob)) / cv2.countNonZero(mask)
+    perimeter = cv2.arcLength(contours[largest], True)
+    circularity = min(1.0, 4 * np.pi * areas[largest] / perimeter ** 2) if perimeter > 0 else 0.0
+    brightness = m["m00"] / (255.0 * area)
+    size = min(1.0, area / RED_DOT_MIN_AREA, RED_DOT_MAX_AREA / area)
+    confidence = float(dominance * circularity * brightness * size)
 
+    return center_x, center_y, confidence
+
+def detect_red_dot(frame):
+    center_x, center_y, _ = locate_red_dot(frame)
     return center_x, center_y
 
-def detect_motion_objects(previous_frame, current_frame, threshold, distinction_threshold):
-    diff = cv2.absdiff(previous_frame, current_frame)
+class RedDotTracker:
+    # Deteção do laser restrita a uma janela à volta da última posição. Há
+    # uma só pesquisa por frame: numa falha a janela cresce (growth) e fica
+    # assim para o frame seguinte; só quando passa max_window se pesquisa a
+    # imagem toda. Um acerto volta a pôr a janela no tamanho base. `misses`
+    # conta frames seguidos sem laser ou com confiança abaixo de
+    # min_confidence.
+    def __init__(self, window=32, max_window=256, growth=2.0, min_confidence=0.0):
+        self.base_window = window
+        self.min_confidence = min_confidence
+        self.max_window = max_window
+        self.growth = growth
+        self.window = window
+        self.last = None
+        self.misses = 0
+        self.full_searches = 0
 
-    # DEBUG: verificar valores médios para avaliar sensibilidade
-    # print(f"mean diff: {np.mean(diff):.2f}, max: {np.max(diff)}")
+    def reset(self):
+        self.last = None
+        self.window = self.base_window
+        self.misses = 0
+
+    def _search_roi(self, frame, half):
+        h, w = frame.shape[:2]
+        cx, cy = int(round(self.last[0])), int(round(self.last[1]))
+        x0, y0 = max(0, cx - half), max(0, cy - half)
+        x1, y1 = min(w, cx + half), min(h, cy + half)
+        if x1 <= x0 or y1 <= y0:
+            return None, None, 0.0
+        pos_x, pos_y, confidence = locate_red_dot(frame[y0:y1, x0:x1])
+        if pos_x is None:
+            return None, None, 0.0
+        return pos_x + x0, pos_y + y0, confidence
+
+    def locate(self, frame):
+        # Um resultado abaixo de min_confidence conta como falha também para a
+        # janela: não recentra nem a encolhe, senão um blob vermelho fraco
+        # perto da última posição prendia a ROI e nunca se pesquisava tudo
+        full_search = self.last is None or self.window > self.max_window
+        if full_search:
+            self.full_searches += 1
+            pos_x, pos_y, confidence = locate_red_dot(frame)
+        else:
+            pos_x, pos_y, confidence = self._search_roi(frame, int(self.window))
+
+        if pos_x is not None and confidence >= self.min_confidence:
+            self.last = (pos_x, pos_y)
+            self.window = self.base_window
+            self.misses = 0
+        else:
+            if full_search:
+                self.last = None
+                self.window = self.base_window
+            else:
+                # Mantém a última posição e tenta uma janela maior no próximo frame
+                self.window *= self.growth
+            self.misses += 1
+        return pos_x, pos_y, confidence
 
-    _, motion_mask = cv2.threshold(diff, threshold, 255, cv2.THRESH_BINARY)
+    def detect(self, frame):
+        pos_x, pos_y, _ = self.locate(frame)
+        return pos_x, pos_y
+
+def downscale_frame(frame, scale):
+    # Reduz com pyrDown enquanto a escala pedida for <= 1/2 e acaba com um
+    # resize INTER_AREA se sobrar um fator não potência de 2
+    if scale >= 1:
+        return frame
+    while scale <= 0.5:
+        frame = cv2.pyrDown(frame)
+        scale *= 2
+    if scale < 1:
+        h, w = frame.shape[:2]
+        frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+    return frame
+
+class FrameDownscaler:
+    # O mesmo que downscale_frame, mas cada nível da pirâmide (e o resize
+    # final) escreve num buffer pré-alocado que é reutilizado nos frames
+    # seguintes. O resultado só é válido até à próxima chamada.
+    def __init__(self):
+        self.buffers = {}
+
+    def _buffer(self, level, shape, dtype):
+        buffer = self.buffers.get(level)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self.buffers[level] = np.empty(shape, dtype)
+        return buffer
+
+    def downscale(self, frame, scale):
+        if scale >= 1:
+            return frame
+        level = 0
+        while scale <= 0.5:
+            h, w = frame.shape[:2]
+            out = self._buffer(level, ((h + 1) // 2, (w + 1) // 2) + frame.shape[2:], frame.dtype)
+            frame = cv2.pyrDown(frame, dst=out)
+            scale *= 2
+            level += 1
+        if scale < 1:
+            h, w = frame.shape[:2]
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            out = self._buffer(level, (size[1], size[0]) + frame.shape[2:], frame.dtype)
+            frame = cv2.resize(frame, size, dst=out, interpolation=cv2.INTER_AREA)
+        return frame
+
+def extract_motion_objects(motion_mask, distinction_threshold, scale=1.0):
+    # `scale` é a razão entre a resolução da máscara e a do display.
+    # Áreas, bboxes e centros são devolvidos em coordenadas do display.
     contours, _ = cv2.findContours(motion_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
+    min_area = distinction_threshold * scale * scale
+    inv_scale = 1.0 / scale
+
     new_objects = []
     for contour in contours:
-        if cv2.contourArea(contour) > distinction_threshold:
+        if cv2.contourArea(contour) > min_area:
             x, y, w, h = cv2.boundingRect(contour)
+            x, y = int(x * inv_scale), int(y * inv_scale)
+            w, h = int(w * inv_scale), int(h * inv_scale)
             center_x, center_y = x + w // 2, y + h // 2
             new_objects.append(((center_x, center_y), (x, y, w, h)))
 
     # Garantir que a maior contour válida seja retornada
     largest = max(new_objects, key=lambda obj: obj[1][2] * obj[1][3]) if new_objects else None
 
-    return new_objects, motion_mask, largest[1] if largest else None
\ No newline at end of file
+    return new_objects, largest[1] if largest else None
+
+_LABEL_BUFFERS = {}
+
+def motion_components(motion_mask, min_area):
+    # Componentes ligadas da máscara como arrays NumPy: áreas (N,), bboxes
+    # (N, 4) em x, y, w, h e centroides (N, 2), já filtradas por área mínima
+    # BBDT (Grana) explícito: nesta máscara é ~2.5x mais rápido do que o
+    # algoritmo que o OpenCV escolhe por omissão. A imagem de labels (int32,
+    # do tamanho da máscara) não é usada e vai para um buffer reutilizado.
+    labels = _LABEL_BUFFERS.get(motion_mask.shape)
+    if labels is None:
+        labels = _LABEL_BUFFERS[motion_mask.shape] = np.empty(motion_mask.shape, np.int32)
+    _, _, stats, centroids = cv2.connectedComponentsWithStatsWithAlgorithm(
+        motion_mask, 8, cv2.CV_32S, cv2.CCL_GRANA, labels=labels)
+    # Label 0 é o fundo
+    stats = stats[1:]
+    keep = stats[:, cv2.CC_STAT_AREA] > min_area
+    return stats[keep, cv2.CC_STAT_AREA], stats[keep, :4], centroids[1:][keep]
+
+def extract_motion_objects_components(motion_mask, distinction_threshold, scale=1.0):
+    # Mesmo contrato que extract_motion_objects, mas o filtro de área e a
+    # escolha do maior são vetorizados: o custo em Python deixa de crescer
+    # com o número de blobs de ruído (folhagem, flicker)
+    _, boxes, _ = motion_components(motion_mask, distinction_threshold * scale * scale)
+    if not len(boxes):
+        return [], None
+
+    boxes = (boxes / scale).astype(np.int32)
+    centers = boxes[:, :2] + boxes[:, 2:] // 2
+    largest = int(np.argmax(boxes[:, 2] * boxes[:, 3]))
+
+    new_objects = [(tuple(center), tuple(box)) for center, box in zip(centers.tolist(), boxes.tolist())]
+    return new_objects, new_objects[largest][1]
+
+OBJECT_EXTRACTORS = {
+    "contours": extract_motion_objects,
+    "components": extract_motion_objects_components,
+}
+
+# ========== MASK CLEANUP ==========
+
+_KERNELS = {}
+
+def structuring_element(size, shape=cv2.MORPH_ELLIPSE):
+    # Os kernels são criados uma vez e reutilizados em todos os frames
+    key = (shape, size)
+    if key not in _KERNELS:
+        _KERNELS[key] = cv2.getStructuringElement(shape, (size, size))
+    return _KERNELS[key]
+
+class MaskCleanup:
+    # Pós-processamento da máscara antes da extração de objetos. Com
+    # threshold baixo a máscara fica cheia de pontos soltos e cada um vira uma
+    # contour; operações de píxel baratas tiram-nos antes do loop em Python.
+    #  - median_blur: filtro de mediana no frame de entrada (0 desliga)
+    #  - open_size: abertura, apaga pontos menores do que o kernel
+    #  - close_size: fecho, junta partes do mesmo alvo
+    #  - dilate_size: dilatação final (0 desliga)
+    # Tamanhos em píxeis da máscara (já reduzida).
+    def __init__(self, open_size=3, close_size=5, dilate_size=0, median_blur=0):
+        self.open_size = open_size
+        self.close_size = close_size
+        self.dilate_size = dilate_size
+        self.median_blur = median_blur
+        self.filtered = None
+
+    def prefilter(self, gray_frame, dst=None):
+        # Com dst o resultado vai sempre para lá (copiado se não houver filtro)
+        if self.median_blur > 1:
+            if dst is None:
+                if self.filtered is None or self.filtered.shape != gray_frame.shape:
+                    self.filtered = np.empty_like(gray_frame)
+                dst = self.filtered
+            # medianBlur só aceita tamanhos ímpares
+            return cv2.medianBlur(gray_frame, self.median_blur | 1, dst=dst)
+        if dst is not None:
+            np.copyto(dst, gray_frame)
+            return dst
+        return gray_frame
+
+    def apply(self, motion_mask):
+        # Em place: a máscara devolvida é a mesma que entra
+        if self.open_size > 1:
+            cv2.morphologyEx(motion_mask, cv2.MORPH_OPEN, structuring_element(self.open_size),
+                             dst=motion_mask)
+        if self.close_size > 1:
+            cv2.morphologyEx(motion_mask, cv2.MORPH_CLOSE, structuring_element(self.close_size),
+                             dst=motion_mask)
+        if self.dilate_size > 1:
+            cv2.dilate(motion_mask, structuring_element(self.dilate_size), dst=motion_mask)
+        return motion_mask
+
+def detect_motion_objects(previous_frame, current_frame, threshold, distinction_threshold, scale=1.0,
+                          extractor="contours", cleanup=None, diff=None, motion_mask=None):
+    # diff e motion_mask: buffers opcionais (do tamanho do frame) para não
+    # alocar as imagens intermédias em cada frame
+    diff = cv2.absdiff(previous_frame, current_frame, dst=diff)
+
+    # DEBUG: verificar valores médios para avaliar sensibilidade
+    # print(f"mean diff: {np.mean(diff):.2f}, max: {np.max(diff)}")
+
+    _, motion_mask = cv2.threshold(diff, threshold, 255, cv2.THRESH_BINARY, dst=motion_mask)
+    if cleanup is not None:
+        cleanup.apply(motion_mask)
+    new_objects, largest = OBJECT_EXTRACTORS[extractor](motion_mask, distinction_threshold, scale)
+
+    return new_objects, motion_mask, largest
+
+# ========== MOTION DETECTOR BACKENDS ==========
+#
+# Todos os backends recebem um frame em cinzento (já reduzido) e devolvem o
+# mesmo contrato que detect_motion_objects: (objects, mask, largest_bbox).
+# `extractor` escolhe como a máscara vira objetos (OBJECT_EXTRACTORS) e
+# `cleanup` (MaskCleanup ou None) filtra o frame de entrada e a máscara.
+# As imagens intermédias e a máscara devolvida são buffers do detetor,
+# reutilizados no frame seguinte.
+
+class FrameDiffDetector:
+    # Diferença entre dois frames consecutivos (comportamento original). O
+    # frame anterior e o atual vivem em dois buffers que trocam de papel em
+    # cada frame, em vez de se copiar o atual para o anterior.
+    def __init__(self, extractor="contours", cleanup=None):
+        self.extractor = extractor
+        self.cleanup = cleanup
+        self.previous_frame = None
+        self.current_frame = None
+        self.diff = None
+        self.motion_mask = None
+
+    def reset(self):
+        self.previous_frame = None
+
+    def _allocate(self, shape):
+        self.previous_frame = np.empty(shape, np.uint8)
+        self.current_frame = np.empty(shape, np.uint8)
+        self.diff = np.empty(shape, np.uint8)
+        self.motion_mask = np.empty(shape, np.uint8)
+
+    def detect(self, gray_frame, threshold, distinction_threshold, scale=1.0):
+        first = self.previous_frame is None or self.previous_frame.shape != gray_frame.shape
+        if first:
+            self._allocate(gray_frame.shape)
+
+        if self.cleanup is not None:
+            self.cleanup.prefilter(gray_frame, dst=self.current_frame)
+        else:
+            np.copyto(self.current_frame, gray_frame)
+
+        if first:
+            result = [], self.motion_mask, None
+            self.motion_mask.fill(0)
+        else:
+            result = detect_motion_objects(self.previous_frame, self.current_frame, threshold,
+                                           distinction_threshold, scale, self.extractor, self.cleanup,
+                                           diff=self.diff, motion_mask=self.motion_mask)
+        self.previous_frame, self.current_frame = self.current_frame, self.previous_frame
+        return result
+
+class RunningAverageDetector:
+    # Compara com uma média móvel exponencial do fundo: um alvo lento fica
+    # como um blob cheio em vez de só as arestas que mudaram entre frames
+    def __init__(self, alpha=0.05, extractor="contours", cleanup=None):
+        self.alpha = alpha
+        self.extractor = extractor
+        self.cleanup = cleanup
+        self.background = None
+        self.background_u8 = None
+        self.diff = None
+        self.motion_mask = None
+
+    def reset(self):
+        self.background = None
+
+    def detect(self, gray_frame, threshold, distinction_threshold, scale=1.0):
+        if self.cleanup is not None:
+            gray_frame = self.cleanup.prefilter(gray_frame)
+        if self.background is None or self.background.shape != gray_frame.shape:
+            self.background = gray_frame.astype(np.float32)
+            self.background_u8 = gray_frame.copy()
+            self.diff = np.empty_like(gray_frame)
+            self.motion_mask = np.zeros_like(gray_frame)
+            return [], self.motion_mask, None
+
+        cv2.convertScaleAbs(self.background, dst=self.background_u8)
+        cv2.absdiff(self.background_u8, gray_frame, dst=self.diff)
+        cv2.threshold(self.diff, threshold, 255, cv2.THRESH_BINARY, dst=self.motion_mask)
+        cv2.accumulateWeighted(gray_frame, self.background, self.alpha)
+        if self.cleanup is not None:
+            self.cleanup.apply(self.motion_mask)
+
+        new_objects, largest = OBJECT_EXTRACTORS[self.extractor](self.motion_mask, distinction_threshold, scale)
+        return new_objects, self.motion_mask, largest
+
+class BackgroundSubtractorDetector:
+    # MOG2/KNN do OpenCV. Sem deteção de sombras para manter o custo por
+    # frame baixo no Pi; o `threshold` da GUI não se aplica (usa var_threshold)
+    def __init__(self, method="mog2", history=200, var_threshold=None, learning_rate=-1,
+                 extractor="contours", cleanup=None):
+        self.method = method
+        self.extractor = extractor
+        self.cleanup = cleanup
+        self.history = history
+        self.var_threshold = var_threshold
+        self.learning_rate = learning_rate
+        self.subtractor = None
+        self.motion_mask = None
+        self.reset()
+
+    def reset(self):
+        if self.method == "knn":
+            dist = 400.0 if self.var_threshold is None else self.var_threshold
+            self.subtractor = cv2.createBackgroundSubtractorKNN(
+                history=self.history, dist2Threshold=dist, detectShadows=False)
+        else:
+            var = 16 if self.var_threshold is None else self.var_threshold
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(
+                history=self.history, varThreshold=var, detectShadows=False)
+
+    def detect(self, gray_frame, threshold, distinction_threshold, scale=1.0):
+        if self.cleanup is not None:
+            gray_frame = self.cleanup.prefilter(gray_frame)
+        if self.motion_mask is None or self.motion_mask.shape != gray_frame.shape:
+            self.motion_mask = np.empty_like(gray_frame)
+        motion_mask = self.subtractor.apply(gray_frame, fgmask=self.motion_mask,
+                                            learningRate=self.learning_rate)
+        if self.cleanup is not None:
+            self.cleanup.apply(motion_mask)
+        new_objects, largest = OBJECT_EXTRACTORS[self.extractor](motion_mask, distinction_threshold, scale)
+        return new_objects, motion_mask, largest
+
+DETECTOR_BACKENDS = {
+    "diff": FrameDiffDetector,
+    "running_average": RunningAverageDetector,
+    "mog2": lambda **kwargs: BackgroundSubtractorDetector("mog2", **kwargs),
+    "knn": lambda **kwargs: BackgroundSubtractorDetector("knn", **kwargs),
+}
+
+def create_detector(name, **kwargs):
+    if name not in DETECTOR_BACKENDS:
+        raise ValueError(f"Detetor desconhecido: {name}")
+    if kwargs.get("extractor", "contours") not in OBJECT_EXTRACTORS:
+        raise ValueError(f"Extração desconhecida: {kwargs['extractor']}")
+    return DETECTOR_BACKENDS[name](**kwargs)
@@ -0,0 +1,396 @@
+# app/engine.py
+
+import time
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .camera import CameraManager
+from .detection import FrameDownscaler, create_detector, MaskCleanup, RedDotTracker
+from .control import (
+    update_servo, read_serial_feedback, start_calibration_step, trigger_fire_command,
+    move_servo_gradually, serial_transmit_time, close_serial, set_serial_worker
+)
+from .controller import PanTiltController
+from .camera_model import CameraModel, DEFAULT_MODEL_PATH
+from .calibration import CalibrationSweep, PixelServoMap
+from .tracker import MultiObjectTracker
+from .prediction import LatencyEstimator
+
+class TrackingEngine(QObject):
+    # Núcleo do sistema sem GUI: câmara, deteção, tracking, controlo dos
+    # servos. Só usa QtCore (timers e sinais), por isso corre com um
+    # QCoreApplication num Pi sem display. A porta série não é aberta aqui:
+    # quem cria o engine passa o SerialWorker (control.connect_serial()) e o
+    # engine fecha-o no close(); sem worker os comandos não saem.
+    #
+    # Quem mostra o estado (a janela Qt) subscreve os sinais:
+    #  - frame_processed(frame, tracks, motion_mask): depois de cada frame; a
+    #    máscara é um buffer do detetor, válido só até ao frame seguinte
+    #  - servo_moved(eixo, ângulo): o engine mudou a posição de um servo
+    #  - tracking_changed(bool), calibration_finished(bool), sweep_finished(mapa ou None)
+    frame_processed = pyqtSignal(object, object, object)
+    servo_moved = pyqtSignal(str, int)
+    tracking_changed = pyqtSignal(bool)
+    calibration_finished = pyqtSignal(bool)
+    sweep_finished = pyqtSignal(object)
+
+    def __init__(self, camera=None, initial=(90, 90), serial_worker=None):
+        super().__init__()
+        self.worker = serial_worker
+        set_serial_worker(serial_worker)
+        # Stream lores já ao tamanho da deteção (metade dos 640x480 do main,
+        # ver detection_scale): a redução é feita pelo ISP e o downscale do
+        # step() fica sem pyrDown
+        self.camera = camera or CameraManager(threaded=True, mode="video", lores_size=(320, 240))
+        self.positions = {'x': int(initial[0]), 'y': int(initial[1])}
+        self.manual_override_time = None
+
+        self.threshold = 5
+        self.distinction_threshold = 6000
+        self.detection_scale = 0.5  # fração da resolução do display usada na deteção
+        # Buffers reutilizados em todos os frames (cinzento e pirâmide)
+        self.gray_buffer = None
+        self.downscaler = FrameDownscaler()
+        self.frame_size = None
+        self.tolerancia = 5
+        self.detector_backend = "diff"
+        # Com a máscara limpa sobram poucos blobs e findContours é o mais
+        # rápido (tools/bench_motion_mask.py: 0.08 vs 0.19 ms com abertura 3).
+        # "components" (connectedComponentsWithStats) só ganha em máscaras
+        # sem limpeza com centenas de blobs de ruído.
+        self.object_extractor = "contours"
+        # Abertura/fecho da máscara antes da extração (tira o ruído do threshold baixo)
+        self.mask_cleanup = MaskCleanup()
+        self.detector = create_detector(self.detector_backend, extractor=self.object_extractor,
+                                        cleanup=self.mask_cleanup)
+        self.tracking_enabled = False
+
+        self.tracker = MultiObjectTracker(min_hits=3)
+        self.target_id = None
+        # Latência captura -> servo, medida em cada comando; o alvo é apontado
+        # para onde o filtro prevê que esteja daqui a esse tempo
+        self.latency = LatencyEstimator()
+        self.max_prediction_uncertainty = 40  # px, para seguir sem deteção
+
+        # PID dos servos a taxa fixa; o tracker só lhe entrega o erro
+        self.servo_controller = PanTiltController(
+            send=self.send_servo_command,
+            rate_hz=50,
+            initial=initial
+        )
+
+        # Apontar direto: o modelo da câmara converte o centro do alvo em
+        # ângulos absolutos e o servo vai lá num só movimento (sem PID)
+        self.direct_aim = False
+        self.camera_model = None
+        self.pixel_servo_map = PixelServoMap.load_if_exists()
+        self.sweep = None
+
+        self.calibrating = False
+        self.dot_tracker = RedDotTracker(min_confidence=0.3)
+
+        # Estatísticas do loop
+        self.reset_stats()
+
+        self.frame_timer = QTimer()
+        self.frame_timer.timeout.connect(self.step)
+        self.calib_timer = QTimer()
+        self.calib_timer.timeout.connect(self.calibration_step)
+        self.feedback_timer = QTimer()
+        self.feedback_timer.timeout.connect(self.sync_with_arduino)
+
+    # ========== LIFECYCLE ==========
+
+    def start(self, interval_ms=10):
+        # A captura corre numa thread própria; o timer só vai buscar o frame
+        # mais recente ao ring buffer, por isso pode correr mais depressa
+        self.reset_stats()
+        self.frame_timer.start(interval_ms)
+        self.feedback_timer.start(100)
+
+    def run(self, duration=None, stats_interval=None, report=print):
+        # Loop sem timer, à velocidade da captura. Os eventos Qt (PID,
+        # feedback, trajetórias) são processados entre frames.
+        from PyQt5.QtCore import QCoreApplication
+        app = QCoreApplication.instance()
+        self.reset_stats()
+        self.feedback_timer.start(100)
+        next_report = self.start_time + stats_interval if stats_interval else None
+        try:
+            while duration is None or time.monotonic() - self.start_time < duration:
+                if not self.step():
+                    time.sleep(0.001)
+                if app is not None:
+                    app.processEvents()
+                if next_report is not None and time.monotonic() >= next_report:
+                    report(self.format_stats())
+                    next_report += stats_interval
+        except KeyboardInterrupt:
+            pass
+        report(self.format_stats())
+
+    def close(self):
+        self.frame_timer.stop()
+        self.calib_timer.stop()
+        self.feedback_timer.stop()
+        self.servo_controller.stop()
+        if self.sweep is not None:
+            self.sweep.stop()
+        self.camera.stop()
+        close_serial(self.worker)
+        set_serial_worker(None)
+        self.worker = None
+
+    # ========== STATS ==========
+
+    def reset_stats(self):
+        # Contadores e início juntos, para o fps ser só deste arranque
+        self.frames_processed = 0
+        self.step_time_total = 0.0
+        self.step_time_max = 0.0
+        self.start_time = time.monotonic()
+
+    def stats(self):
+        elapsed = max(1e-9, time.monotonic() - self.start_time)
+        frames = self.frames_processed
+        stats = {
+            "frames": frames,
+            "fps": frames / elapsed,
+            "step_ms_mean": self.step_time_total / frames * 1000 if frames else 0.0,
+            "step_ms_max": self.step_time_max * 1000,
+            "dropped_frames": self.camera.dropped_frames,
+            "tracks": len(self.tracker.confirmed_tracks()),
+            "latency_ms": self.latency.value * 1000,
+        }
+        if self.worker:
+            stats["commands_sent"] = self.worker.commands_sent
+            stats["commands_coalesced"] = self.worker.commands_coalesced
+        return stats
+
+    def format_stats(self):
+        s = self.stats()
+        line = (f"{s['frames']} frames, {s['fps']:.1f} fps, passo {s['step_ms_mean']:.2f} ms "
+                f"(máx {s['step_ms_max']:.2f}), perdidos {s['dropped_frames']}, "
+                f"tracks {s['tracks']}, latência {s['latency_ms']:.0f} ms")
+        if "commands_sent" in s:
+            line += f", comandos {s['commands_sent']} (+{s['commands_coalesced']} agrupados)"
+        return line
+
+    # ========== SETTINGS ==========
+
+    def set_tracking(self, enabled):
+        self.tracking_enabled = enabled
+        self.detector.reset()
+        self.tracker.reset()
+        self.target_id = None
+        self.servo_controller.stop()
+        self.tracking_changed.emit(enabled)
+
+    def set_min_hits(self, value):
+        self.tracker.min_hits = value
+
+    def configure_pid(self, **params):
+        self.servo_controller.configure(**params)
+
+    def set_detector_backend(self, name):
+        self.detector_backend = name
+        self.detector = create_detector(name, extractor=self.object_extractor,
+                                        cleanup=self.detector.cleanup)
+
+    def set_object_extractor(self, name):
+        self.object_extractor = name
+        self.detector.extractor = name
+
+    def set_mask_cleanup(self, enabled):
+        self.detector.cleanup = self.mask_cleanup if enabled else None
+
+    def set_direct_aim(self, enabled):
+        self.direct_aim = enabled
+        self.servo_controller.stop()
+
+    # ========== SERVOS ==========
+
+    def _set_position(self, axis, value):
+        self.positions[axis] = int(value)
+        self.servo_moved.emit(axis, int(value))
+
+    def send_servo_command(self, axis, value):
+        update_servo(axis, value)
+        self._set_position(axis, value)
+
+    def set_servo(self, axis, value):
+        # Posição manual (slider): o feedback do Arduino fica ignorado uns
+        # instantes para não puxar o valor de volta
+        update_servo(axis, value)
+        self.positions[axis] = int(value)
+        self.servo_controller.set_position(axis, value)
+        self.manual_override_time = time.monotonic()
+
+    def move_servos_to(self, x, y):
+        self.send_servo_command('x', x)
+        self.send_servo_command('y', y)
+
+    def fire(self):
+        trigger_fire_command()
+
+    def sync_with_arduino(self):
+        if self.manual_override_time is not None and time.monotonic() - self.manual_override_time < 0.3:
+            return
+
+        if self.servo_controller.is_active():
+            return  # durante o seguimento a posição de referência é a do PID
+
+        def set_x(val):
+            self._set_position('x', val)
+            self.servo_controller.set_position('x', val)
+
+        def set_y(val):
+            self._set_position('y', val)
+            self.servo_controller.set_position('y', val)
+
+        read_serial_feedback(set_x, set_y)
+
+    # ========== CALIBRATION ==========
+
+    def start_calibration(self):
+        self.calibrating = True
+        self.dot_tracker.reset()
+        self.calib_timer.start(200)
+
+    def stop_calibration(self):
+        self.calibrating = False
+        self.calib_timer.stop()
+
+    def calibration_step(self):
+        def get_vals():
+            return self.positions['x'], self.positions['y']
+
+        def set_vals(x, y):
+            self._set_position('x', x)
+            self._set_position('y', y)
+
+        def finish(converged):
+            self.stop_calibration()
+            # Laser no centro da imagem: estes ângulos são o boresight do modelo
+            if converged and self.camera_model is not None:
+                self.camera_model.boresight = get_vals()
+                self.camera_model.save(DEFAULT_MODEL_PATH)
+            self.calibration_finished.emit(converged)
+
+        frame, pos_x, pos_y = start_calibration_step(
+            camera=self.camera,
+            get_slider_vals=get_vals,
+            set_slider_vals=set_vals,
+            finish_callback=finish,
+            tolerancia=self.tolerancia,
+            dot_tracker=self.dot_tracker
+        )
+
+        if frame is not None:
+            self.frame_processed.emit(frame, [], None)
+
+    def start_sweep(self):
+        if self.tracking_enabled:
+            self.set_tracking(False)
+        # Os dois mexem nos servos a partir do laser: não podem correr juntos
+        if self.calibrating:
+            self.stop_calibration()
+            self.calibration_finished.emit(False)
+        self.sweep = CalibrationSweep(
+            camera=self.camera,
+            move_servos=self.move_servos_to,
+            finish_callback=self._on_sweep_finished
+        )
+        self.sweep.start()
+
+    def stop_sweep(self):
+        if self.sweep is not None:
+            self.sweep.stop()
+            self.sweep = None
+
+    def _on_sweep_finished(self, mapping):
+        if mapping is not None:
+            self.pixel_servo_map = mapping
+        self.sweep = None
+        self.sweep_finished.emit(mapping)
+
+    # ========== TRACKING ==========
+
+    def follow_object_smooth(self, center):
+        center_x, center_y = center
+
+        frame_w, frame_h = self.frame_size
+        mid_x = frame_w // 2
+        mid_y = frame_h // 2
+
+        if self.direct_aim and (self.pixel_servo_map or self.camera_model):
+            # O mapa medido com o laser tem prioridade sobre o modelo teórico
+            if self.pixel_servo_map is not None and self.pixel_servo_map.image_size == self.frame_size:
+                target_x, target_y = self.pixel_servo_map.lookup(center_x, center_y)
+            else:
+                target_x, target_y = self.camera_model.pixel_to_servo(center_x, center_y)
+            target_x, target_y = int(round(target_x)), int(round(target_y))
+            move_servo_gradually('x', self.positions['x'], target_x)
+            move_servo_gradually('y', self.positions['y'], target_y)
+            self._set_position('x', target_x)
+            self._set_position('y', target_y)
+            return
+
+        error_x = center_x - mid_x
+        error_y = center_y - mid_y
+
+        # O PanTiltController corre à sua própria taxa e envia os comandos
+        self.servo_controller.set_error(error_x, error_y, self.camera.last_timestamp)
+
+    def step(self):
+        # Processa o frame novo mais recente; devolve False se não havia nenhum
+        frame = self.camera.get_frame()
+        if frame is None:
+            return False
+        step_start = time.perf_counter()
+
+        frame_h, frame_w = frame.shape[:2]
+        self.frame_size = (frame_w, frame_h)
+        if self.camera_model is None or self.camera_model.image_size != self.frame_size:
+            self.camera_model = CameraModel.load_or_default(DEFAULT_MODEL_PATH, self.frame_size)
+
+        # Fast path: usar o plano Y do stream lores em vez de converter o BGR
+        gray_frame = self.camera.get_luma()
+        if gray_frame is None:
+            if self.gray_buffer is None or self.gray_buffer.shape != frame.shape[:2]:
+                self.gray_buffer = np.empty(frame.shape[:2], np.uint8)
+            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray_buffer)
+
+        # A deteção corre numa versão reduzida; a escala real é medida a partir
+        # das dimensões para cobrir também um stream lores mais pequeno
+        gray_frame = self.downscaler.downscale(gray_frame, self.detection_scale * frame_w / gray_frame.shape[1])
+        scale = gray_frame.shape[1] / frame_w
+
+        tracks, motion_mask = [], None
+        if self.tracking_enabled:
+            detected_objects, motion_mask, large = self.detector.detect(
+                gray_frame, self.threshold, self.distinction_threshold, scale
+            )
+            tracks = self.tracker.update(detected_objects, self.camera.last_timestamp)
+
+            target = self.tracker.select_target(self.target_id)
+            self.target_id = target.id if target else None
+            if target is not None:
+                # A latência medida já vai da captura ao comando no servo: o
+                # alvo é previsto para captura + latência (e não agora + latência)
+                aim_time = self.camera.last_timestamp + self.latency.value
+                # Sem deteção neste frame segue a previsão enquanto for fiável
+                if not target.lost or target.predictor.position_uncertainty(aim_time) < self.max_prediction_uncertainty:
+                    self.follow_object_smooth(target.predicted_center(aim_time))
+                    self.latency.add_sample(time.monotonic() - self.camera.last_timestamp
+                                            + 0.5 / self.servo_controller.rate_hz + serial_transmit_time(8))
+
+        elapsed = time.perf_counter() - step_start
+        self.frames_processed += 1
+        self.step_time_total += elapsed
+        self.step_time_max = max(self.step_time_max, elapsed)
+
+        self.frame_processed.emit(frame, tracks, motion_mask)
+        return True
@@ -1,32 +1,43 @@
 import sys
-import cv2
+import time
+import numpy as np
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QSlider,
-    QHBoxLayout, QGridLayout, QGroupBox, QSizePolicy, QScrollArea
-)
-from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import QTimer, Qt, QElapsedTimer
-
-from .camera import CameraManager
-from .detection import detect_red_dot, detect_motion_objects
-from .control import (
-    send_commands, update_servo, calibrate_motors,
-    read_serial_feedback, perform_motion_sequence,
-    start_calibration_step, trigger_fire_command,
-    move_servo_gradually
+    QHBoxLayout, QGroupBox, QCheckBox, QSpinBox
 )
+from PyQt5.QtCore import Qt
+
+from .engine import TrackingEngine
+from .video_widget import VideoWidget
+from .overlay import OverlayCompositor
+from .detection import DETECTOR_BACKENDS, OBJECT_EXTRACTORS
 from .easter_eggs import play_motion
-from .widgets import create_tracker_group
+from .widgets import create_tracker_group, create_detector_group, create_pid_group
 
 class MotionTrackingApp(QWidget):
-    def __init__(self):
+    # Janela Qt: só mostra o estado do TrackingEngine (sinais) e passa-lhe as
+    # ações do utilizador; a lógica de deteção/controlo vive no engine
+    def __init__(self, engine=None):
         super().__init__()
 
-        self.camera = CameraManager()
-        self.manual_override_timer = QElapsedTimer()
-
-        self.video_label = QLabel(self)
-        self.video_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.engine = engine or TrackingEngine()
+
+        self.video_widget = VideoWidget(self)
+        # O preview é atualizado a uma taxa menor do que a deteção
+        self.display_fps = 15
+        self.last_display_time = 0.0
+        self.display_fps_spin = QSpinBox()
+        self.display_fps_spin.setRange(1, 60)
+        self.display_fps_spin.setValue(self.display_fps)
+        self.display_fps_spin.valueChanged.connect(self.update_display_fps)
+        # Camadas de overlay do preview
+        self.overlay = OverlayCompositor()
+        self.mask_layer_checkbox = QCheckBox("Mostrar máscara")
+        self.mask_layer_checkbox.setChecked(True)
+        self.mask_layer_checkbox.toggled.connect(lambda checked: self.overlay.set_layer("mask", checked))
+        self.tracks_layer_checkbox = QCheckBox("Mostrar objetos")
+        self.tracks_layer_checkbox.setChecked(True)
+        self.tracks_layer_checkbox.toggled.connect(lambda checked: self.overlay.set_layer("tracks", checked))
 
         self.toggle_button = QPushButton("Iniciar Rastreamento")
         self.toggle_button.clicked.connect(self.toggle_tracking)
@@ -38,16 +49,24 @@ class MotionTrackingApp(QWidget):
         self.calib_button.setCheckable(True)
         self.calib_button.clicked.connect(self.toggle_calibration)
 
+        self.direct_aim_checkbox = QCheckBox("Apontar direto (modelo da câmara)")
+        self.direct_aim_checkbox.toggled.connect(self.engine.set_direct_aim)
+
+        # Varrimento do laser -> mapa píxel->servo gravado em disco
+        self.sweep_button = QPushButton("Varrimento de calibração")
+        self.sweep_button.setCheckable(True)
+        self.sweep_button.clicked.connect(self.toggle_sweep)
+
         self.servo_x_slider = QSlider(Qt.Orientation.Horizontal)
         self.servo_x_slider.setMinimum(0)
         self.servo_x_slider.setMaximum(180)
-        self.servo_x_slider.setValue(90)
+        self.servo_x_slider.setValue(self.engine.positions['x'])
         self.servo_x_slider.sliderReleased.connect(self.on_servo_x_release)
 
         self.servo_y_slider = QSlider(Qt.Orientation.Horizontal)
         self.servo_y_slider.setMinimum(0)
         self.servo_y_slider.setMaximum(180)
-        self.servo_y_slider.setValue(90)
+        self.servo_y_slider.setValue(self.engine.positions['y'])
         self.servo_y_slider.sliderReleased.connect(self.on_servo_y_release)
 
         self.yes_button = QPushButton("Diz que sim")
@@ -60,27 +79,42 @@ class MotionTrackingApp(QWidget):
         self.mega_yes_button.clicked.connect(lambda: play_motion('y', self.servo_y_slider.value(), fast=True))
         self.mega_no_button.clicked.connect(lambda: play_motion('x', self.servo_x_slider.value(), fast=True))
 
-        self.threshold = 5
-        self.distinction_threshold = 6000
-        self.tolerancia = 5
-        self.previous_frame = None
-        self.tracking_enabled = False
-        self.calibrating = False
+        self.cleanup_checkbox = QCheckBox("Limpar máscara (abertura/fecho)")
+        self.cleanup_checkbox.setChecked(self.engine.detector.cleanup is not None)
+        self.cleanup_checkbox.toggled.connect(self.engine.set_mask_cleanup)
 
-        self.object_consistency_counter = 0
-        self.required_consistency = 3  # frames consecutivos
-        self.last_tracked_bbox = None
+        pid = self.engine.servo_controller.axes['x']
+        self.pid_spins, pid_group = create_pid_group(
+            pid.kp, pid.ki, pid.kd, callback=self.update_pid_parameter
+        )
 
         self.consistency_slider, self.consistency_label, tracker_group = create_tracker_group(
-            initial_value=self.required_consistency,
+            initial_value=self.engine.tracker.min_hits,
             callback=self.update_consistency_threshold
         )
 
+        self.detector_combo, self.extractor_combo, detector_group = create_detector_group(
+            backends=list(DETECTOR_BACKENDS),
+            initial=self.engine.detector_backend,
+            callback=self.engine.set_detector_backend,
+            extractors=list(OBJECT_EXTRACTORS),
+            initial_extractor=self.engine.object_extractor,
+            extractor_callback=self.engine.set_object_extractor
+        )
+
         layout = QVBoxLayout()
-        layout.addWidget(self.video_label)
+        layout.addWidget(self.video_widget)
+        display_layout = QHBoxLayout()
+        display_layout.addWidget(QLabel("FPS do preview"))
+        display_layout.addWidget(self.display_fps_spin)
+        display_layout.addWidget(self.mask_layer_checkbox)
+        display_layout.addWidget(self.tracks_layer_checkbox)
+        layout.addLayout(display_layout)
         layout.addWidget(self.toggle_button)
         layout.addWidget(self.fire_button)
         layout.addWidget(self.calib_button)
+        layout.addWidget(self.sweep_button)
+        layout.addWidget(self.direct_aim_checkbox)
 
         servo_group = QGroupBox("Servos")
         servo_layout = QVBoxLayout()
@@ -92,6 +126,9 @@ class MotionTrackingApp(QWidget):
         layout.addWidget(servo_group)
 
         layout.addWidget(tracker_group)
+        layout.addWidget(detector_group)
+        layout.addWidget(self.cleanup_checkbox)
+        layout.addWidget(pid_group)
 
         easter_group = QGroupBox("Easter Eggs")
         easter_layout = QVBoxLayout()
@@ -106,147 +143,88 @@ class MotionTrackingApp(QWidget):
         self.setWindowTitle("Rastreamento de Movimento")
         self.resize(800, 700)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
-
-        self.calib_timer = QTimer()
-        self.calib_timer.timeout.connect(self.calibration_loop)
+        self.engine.frame_processed.connect(self.on_frame_processed)
+        self.engine.servo_moved.connect(self.on_servo_moved)
+        self.engine.tracking_changed.connect(self.on_tracking_changed)
+        self.engine.calibration_finished.connect(self.on_calibration_finished)
+        self.engine.sweep_finished.connect(self.on_sweep_finished)
+        self.engine.start()
 
-        self.feedback_timer = QTimer()
-        self.feedback_timer.timeout.connect(self.sync_sliders_with_arduino)
-        self.feedback_timer.start(100)
+    def closeEvent(self, event):
+        self.engine.close()
+        super().closeEvent(event)
 
     def update_consistency_threshold(self, value):
-        self.required_consistency = value
+        self.engine.set_min_hits(value)
         self.consistency_label.setText(f"Consistência: {value}")
 
+    def update_pid_parameter(self, name, value):
+        self.engine.configure_pid(**{name: value})
+
+    def update_display_fps(self, value):
+        self.display_fps = value
+
+    def on_servo_moved(self, axis, value):
+        slider = self.servo_x_slider if axis == 'x' else self.servo_y_slider
+        slider.setValue(value)
+
+    def toggle_sweep(self, checked):
+        if checked:
+            self.sweep_button.setText("Parar Varrimento")
+            self.engine.start_sweep()
+        else:
+            self.engine.stop_sweep()
+            self.sweep_button.setText("Varrimento de calibração")
+
+    def on_sweep_finished(self, mapping):
+        self.sweep_button.setChecked(False)
+        self.sweep_button.setText("Varrimento de calibração")
+
     def toggle_tracking(self):
-        self.tracking_enabled = not self.tracking_enabled
+        self.engine.set_tracking(not self.engine.tracking_enabled)
+
+    def on_tracking_changed(self, enabled):
         self.toggle_button.setText(
-            "Parar Rastreamento" if self.tracking_enabled else "Iniciar Rastreamento"
+            "Parar Rastreamento" if enabled else "Iniciar Rastreamento"
         )
 
     def trigger_fire(self):
-        trigger_fire_command()
+        self.engine.fire()
 
     def on_servo_x_release(self):
-        update_servo('x', self.servo_x_slider.value())
-        self.manual_override_timer.start()
+        self.engine.set_servo('x', self.servo_x_slider.value())
 
     def on_servo_y_release(self):
-        update_servo('y', self.servo_y_slider.value())
-        self.manual_override_timer.start()
+        self.engine.set_servo('y', self.servo_y_slider.value())
 
     def toggle_calibration(self, checked):
         if checked:
-            self.calibrating = True
             self.calib_button.setText("Parar Calibração")
-            self.calib_timer.start(200)
+            self.engine.start_calibration()
         else:
-            self.calibrating = False
             self.calib_button.setText("Iniciar Calibração")
-            self.calib_timer.stop()
-
-    def calibration_loop(self):
-        def get_vals():
-            return self.servo_x_slider.value(), self.servo_y_slider.value()
-
-        def set_vals(x, y):
-            self.servo_x_slider.setValue(x)
-            self.servo_y_slider.setValue(y)
-
-        def finish():
-            self.calib_button.setChecked(False)
-            self.toggle_calibration(False)
-
-        frame, pos_x, pos_y = start_calibration_step(
-            camera=self.camera,
-            get_slider_vals=get_vals,
-            set_slider_vals=set_vals,
-            finish_callback=finish,
-            tolerancia=self.tolerancia
-        )
+            self.engine.stop_calibration()
 
-        if frame is not None:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb.shape
-            img = QImage(rgb.data, w, h, ch * w, QImage.Format.Format_RGB888)
-            self.video_label.setPixmap(QPixmap.fromImage(img))
+    def on_calibration_finished(self, converged):
+        self.calib_button.setChecked(False)
+        self.calib_button.setText("Iniciar Calibração")
 
-    def sync_sliders_with_arduino(self):
-        if self.manual_override_timer.isValid() and self.manual_override_timer.elapsed() < 300:
-            return  # skip update if within 300ms of manual override
-
-        def set_x(val): self.servo_x_slider.setValue(val)
-        def set_y(val): self.servo_y_slider.setValue(val)
-        read_serial_feedback(set_x, set_y)
-
-    def follow_object_smooth(self, bbox):
-        x, y, w, h = bbox
-        center_x = x + w // 2
-        center_y = y + h // 2
-
-        frame_h, frame_w = self.previous_frame.shape
-        mid_x = frame_w // 2
-        mid_y = frame_h // 2
-
-        error_x = center_x - mid_x
-        error_y = center_y - mid_y
-
-        current_x = self.servo_x_slider.value()
-        current_y = self.servo_y_slider.value()
-
-        Kx, Ky = 0.2, 0.2
-        target_x = max(0, min(180, current_x + int(Kx * error_x)))
-        target_y = max(0, min(180, current_y + int(Ky * error_y)))
-
-        move_servo_gradually('x', current_x, target_x)
-        move_servo_gradually('y', current_y, target_y)
-
-        self.servo_x_slider.setValue(target_x)
-        self.servo_y_slider.setValue(target_y)
-
-    def update_frame(self):
-        frame = self.camera.get_frame()
-        if frame is None:
+    def on_frame_processed(self, frame, tracks, motion_mask):
+        # A deteção corre em todos os frames; o preview (e os overlays) só à
+        # taxa display_fps
+        now = time.monotonic()
+        if now - self.last_display_time < 1.0 / self.display_fps:
             return
+        self.last_display_time = now
 
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        if self.tracking_enabled and self.previous_frame is not None:
-            detected_objects, motion_mask, large = detect_motion_objects(
-                self.previous_frame, gray_frame,
-                self.threshold, self.distinction_threshold
-            )
-
-            colors = [(0, 0, 255), (255, 0, 0), (0, 255, 255), (255, 0, 255)]
-
-            for i, (center, bbox) in enumerate(detected_objects):
-                color = colors[i % len(colors)]
-                cv2.circle(frame, center, 5, color, -1)
-                x, y, w, h = bbox
-                cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
-                cv2.putText(frame, f"Objeto {i+1}", (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-            frame[motion_mask > 0] = (0, 255, 0)
-
-            if large:
-                if self.last_tracked_bbox and abs(large[0] - self.last_tracked_bbox[0]) < 30 and abs(large[1] - self.last_tracked_bbox[1]) < 30:
-                    self.object_consistency_counter += 1
-                else:
-                    self.object_consistency_counter = 1
-
-                self.last_tracked_bbox = large
-
-                if self.object_consistency_counter >= self.required_consistency:
-                    self.follow_object_smooth(large)
-
-        self.previous_frame = gray_frame.copy()
-        self.video_label.setPixmap(self.camera.to_qt_image(frame))
+        # Overlays desenhados no buffer do preview, não no frame da câmara
+        display = self.video_widget.frame_buffer(frame.shape)
+        np.copyto(display, frame)
+        self.overlay.render(display, tracks, motion_mask)
+        self.video_widget.show_frame(display)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MotionTrackingApp()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,89 @@
+# app/overlay.py
+
+import cv2
+import numpy as np
+
+TRACK_COLORS = [(0, 0, 255), (255, 0, 0), (0, 255, 255), (255, 0, 255)]
+MASK_COLOR = (0, 255, 0)
+
+OVERLAY_LAYERS = ("mask", "tracks")
+
+class OverlayCompositor:
+    # Desenha os overlays do preview por camadas que se podem ligar/desligar.
+    #  - "mask": a máscara de movimento pintada com cv2.copyTo a partir de um
+    #    plano de cor pré-alocado (mode="solid", como o antigo
+    #    frame[mask > 0] = cor) ou somada com cv2.add (mode="add", tinge sem
+    #    esconder a imagem). Sem máscara booleana nem fancy indexing.
+    #  - "tracks": círculo, bbox e etiqueta de cada track; o texto das
+    #    etiquetas fica em cache por id.
+    # Os buffers (plano de cor, máscara redimensionada) são criados quando o
+    # tamanho do frame muda e reutilizados nos frames seguintes.
+    def __init__(self, mode="solid", mask_color=MASK_COLOR, add_strength=0.5):
+        self.mode = mode
+        self.mask_color = mask_color
+        self.add_strength = add_strength
+        self.layers = {name: True for name in OVERLAY_LAYERS}
+        self.color_plane = None
+        self.mask_buffer = None
+        self.labels = {}
+
+    def set_layer(self, name, enabled):
+        if name not in self.layers:
+            raise ValueError(f"Camada desconhecida: {name}")
+        self.layers[name] = enabled
+
+    def _color_plane(self, shape):
+        h, w = shape[:2]
+        if self.color_plane is None or self.color_plane.shape[:2] != (h, w):
+            color = self.mask_color
+            if self.mode == "add":
+                color = tuple(int(c * self.add_strength) for c in color)
+            self.color_plane = np.empty((h, w, 3), np.uint8)
+            self.color_plane[:] = color
+        return self.color_plane
+
+    def _full_size_mask(self, motion_mask, shape):
+        h, w = shape[:2]
+        if motion_mask.shape == (h, w):
+            return motion_mask
+        if self.mask_buffer is None or self.mask_buffer.shape != (h, w):
+            self.mask_buffer = np.empty((h, w), np.uint8)
+        cv2.resize(motion_mask, (w, h), dst=self.mask_buffer, interpolation=cv2.INTER_NEAREST)
+        return self.mask_buffer
+
+    def _label(self, track_id):
+        label = self.labels.get(track_id)
+        if label is None:
+            # Os ids só crescem: limpar de vez em quando para a cache não crescer sem fim
+            if len(self.labels) > 256:
+                self.labels.clear()
+            label = self.labels[track_id] = f"Objeto {track_id}"
+        return label
+
+    def draw_mask(self, display, motion_mask):
+        mask = self._full_size_mask(motion_mask, display.shape)
+        plane = self._color_plane(display.shape)
+        if self.mode == "add":
+            cv2.add(display, plane, dst=display, mask=mask)
+        else:
+            cv2.copyTo(plane, mask, display)
+        return display
+
+    def draw_tracks(self, display, tracks):
+        for track in tracks:
+            if track.lost:
+                continue
+            color = TRACK_COLORS[track.id % len(TRACK_COLORS)]
+            cv2.circle(display, track.center, 5, color, -1)
+            x, y, w, h = track.bbox
+            cv2.rectangle(display, (x, y), (x + w, y + h), color, 2)
+            cv2.putText(display, self._label(track.id), (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        return display
+
+    def render(self, display, tracks=(), motion_mask=None):
+        # Máscara primeiro para as bboxes ficarem por cima
+        if self.layers["mask"] and motion_mask is not None:
+            self.draw_mask(display, motion_mask)
+        if self.layers["tracks"]:
+            self.draw_tracks(display, tracks)
+        return display
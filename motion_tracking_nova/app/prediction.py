@@ -0,0 +1,80 @@
+# app/prediction.py
+
+import time
+
+import numpy as np
+
+class KalmanPredictor:
+    # Filtro de Kalman de velocidade constante em pixels.
+    # Estado [x, y, vx, vy]; o tempo é em segundos (time.monotonic).
+    def __init__(self, x, y, timestamp=None, process_noise=500.0, measurement_noise=4.0):
+        self.state = np.array([x, y, 0.0, 0.0], dtype=np.float64)
+        self.covariance = np.diag([measurement_noise, measurement_noise, 1e4, 1e4])
+        self.process_noise = process_noise
+        self.R = np.eye(2) * measurement_noise
+        self.H = np.array([[1.0, 0.0, 0.0, 0.0],
+                           [0.0, 1.0, 0.0, 0.0]])
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+
+    def _transition(self, dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        # Ruído de processo para aceleração branca (modelo discreto)
+        q = self.process_noise
+        dt2, dt3, dt4 = dt * dt, dt ** 3 / 2, dt ** 4 / 4
+        Q = q * np.array([[dt4, 0, dt3, 0],
+                          [0, dt4, 0, dt3],
+                          [dt3, 0, dt2, 0],
+                          [0, dt3, 0, dt2]])
+        return F, Q
+
+    def predict(self, timestamp=None):
+        # Avança o filtro até `timestamp`
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        dt = max(0.0, timestamp - self.timestamp)
+        if dt > 0:
+            F, Q = self._transition(dt)
+            self.state = F @ self.state
+            self.covariance = F @ self.covariance @ F.T + Q
+            self.timestamp = timestamp
+        return self.state[:2]
+
+    def update(self, x, y, timestamp=None):
+        self.predict(timestamp)
+        z = np.array([x, y], dtype=np.float64)
+        S = self.H @ self.covariance @ self.H.T + self.R
+        K = self.covariance @ self.H.T @ np.linalg.inv(S)
+        self.state = self.state + K @ (z - self.H @ self.state)
+        self.covariance = (np.eye(4) - K @ self.H) @ self.covariance
+        return self.state[:2]
+
+    def predict_state(self, timestamp):
+        # Estado e covariância previstos em `timestamp` sem alterar o filtro
+        dt = max(0.0, timestamp - self.timestamp)
+        F, Q = self._transition(dt)
+        return F @ self.state, F @ self.covariance @ F.T + Q
+
+    def predict_position(self, timestamp):
+        state, _ = self.predict_state(timestamp)
+        return state[0], state[1]
+
+    def position_uncertainty(self, timestamp=None):
+        # Desvio padrão (px) da posição prevista, útil para decidir se ainda
+        # vale a pena seguir a previsão durante frames sem deteção
+        timestamp = self.timestamp if timestamp is None else timestamp
+        _, covariance = self.predict_state(timestamp)
+        return float(np.sqrt(covariance[0, 0] + covariance[1, 1]))
+
+    @property
+    def velocity(self):
+        return self.state[2], self.state[3]
+
+class LatencyEstimator:
+    # Média móvel exponencial da latência captura -> comando no servo
+    def __init__(self, initial=0.05, alpha=0.1):
+        self.value = initial
+        self.alpha = alpha
+
+    def add_sample(self, latency):
+        self.value += self.alpha * (latency - self.value)
+        return self.value
@@ -0,0 +1,194 @@
+# app/protocol.py
+#
+# Protocolo binário entre o Pi e o Arduino (arduino/main.ino).
+#
+# Frame: START | OPCODE | PAYLOAD | CRC8
+#   - START é sempre 0xA5
+#   - o tamanho do payload é fixo por opcode (PAYLOAD_SIZES), por isso não há
+#     byte de comprimento
+#   - CRC8 (polinómio 0x07, init 0x00) calculado sobre OPCODE + PAYLOAD
+#
+# Os ângulos vão num byte (0-180). STEP empacota os três sinais do antigo
+# comando "[x,y,z]": bits 0-1 movimento X, bits 2-3 movimento Y, bit 4 disparo.
+#
+# Negociação de baud rate (ver app/serial_link.py): o firmware arranca sempre
+# a BAUD_RATES[0]; HELLO devolve CAPS com um bitmask dos índices suportados,
+# SET_BAUD pede a mudança (o firmware responde ACK ainda à taxa antiga) e um
+# PING/PONG à nova taxa confirma o link.
+#
+# SERVO_TARGET (eixo, ângulo, v_max, a_max) pede ao firmware um perfil
+# trapezoidal até ao ângulo; v_max em graus/s e a_max em graus/s², u16 LE.
+
+START_BYTE = 0xA5
+
+# Pi -> Arduino
+OP_SERVO_X = 0x01
+OP_SERVO_Y = 0x02
+OP_SERVO_XY = 0x03
+OP_STEP = 0x04
+OP_CALIBRATE = 0x05
+OP_PING = 0x06
+OP_HELLO = 0x07
+OP_SET_BAUD = 0x08
+OP_SERVO_TARGET = 0x09
+
+# Arduino -> Pi
+OP_POS = 0x81
+OP_PONG = 0x82
+OP_CAPS = 0x83
+OP_ACK = 0x84
+
+BAUD_RATES = (9600, 115200, 250000, 500000)
+
+PAYLOAD_SIZES = {
+    OP_SERVO_X: 1,
+    OP_SERVO_Y: 1,
+    OP_SERVO_XY: 2,
+    OP_STEP: 1,
+    OP_CALIBRATE: 0,
+    OP_PING: 1,
+    OP_HELLO: 0,
+    OP_SET_BAUD: 1,
+    OP_SERVO_TARGET: 6,
+    OP_POS: 2,
+    OP_PONG: 1,
+    OP_CAPS: 1,
+    OP_ACK: 1,
+}
+
+def _build_crc8_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _build_crc8_table()
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+# ========== ENCODING ==========
+
+def encode_frame(opcode, payload=b""):
+    payload = bytes(payload)
+    if PAYLOAD_SIZES.get(opcode) != len(payload):
+        raise ValueError(f"Payload inválido para opcode 0x{opcode:02X}: {len(payload)} bytes")
+    body = bytes((opcode,)) + payload
+    return bytes((START_BYTE,)) + body + bytes((crc8(body),))
+
+def _angle(value):
+    return max(0, min(180, int(value)))
+
+def encode_servo(axis, angle):
+    opcode = OP_SERVO_Y if axis.lower() == 'y' else OP_SERVO_X
+    return encode_frame(opcode, (_angle(angle),))
+
+def encode_servo_xy(angle_x, angle_y):
+    return encode_frame(OP_SERVO_XY, (_angle(angle_x), _angle(angle_y)))
+
+def encode_servo_target(axis, angle, max_velocity, max_accel):
+    axis_id = 1 if axis.lower() == 'y' else 0
+    vmax = max(1, min(0xFFFF, int(max_velocity)))
+    amax = max(1, min(0xFFFF, int(max_accel)))
+    return encode_frame(OP_SERVO_TARGET, (
+        axis_id, _angle(angle), vmax & 0xFF, vmax >> 8, amax & 0xFF, amax >> 8
+    ))
+
+def decode_servo_target(payload):
+    axis = 'y' if payload[0] == 1 else 'x'
+    return axis, payload[1], payload[2] | (payload[3] << 8), payload[4] | (payload[5] << 8)
+
+def encode_step(signal_x, signal_y, fire):
+    packed = (signal_x & 0x03) | ((signal_y & 0x03) << 2) | ((1 if fire else 0) << 4)
+    return encode_frame(OP_STEP, (packed,))
+
+def encode_calibrate():
+    return encode_frame(OP_CALIBRATE)
+
+def encode_pos(angle_x, angle_y):
+    return encode_frame(OP_POS, (_angle(angle_x), _angle(angle_y)))
+
+def encode_ping(seq):
+    return encode_frame(OP_PING, (seq & 0xFF,))
+
+def encode_hello():
+    return encode_frame(OP_HELLO)
+
+def encode_set_baud(baudrate):
+    return encode_frame(OP_SET_BAUD, (BAUD_RATES.index(baudrate),))
+
+def baud_mask(baudrates):
+    mask = 0
+    for rate in baudrates:
+        mask |= 1 << BAUD_RATES.index(rate)
+    return mask
+
+def baudrates_from_mask(mask):
+    return [rate for i, rate in enumerate(BAUD_RATES) if mask & (1 << i)]
+
+def decode_step(payload):
+    packed = payload[0]
+    return packed & 0x03, (packed >> 2) & 0x03, (packed >> 4) & 0x01
+
+# ========== DECODING ==========
+
+class FrameDecoder:
+    # Decoder incremental: recebe bytes soltos da porta série e devolve os
+    # frames completos. Frames com CRC errado ou opcode desconhecido são
+    # descartados e o decoder volta a procurar o próximo START.
+    #
+    # Fast path: no caso normal cada leitura traz frames inteiros, com um
+    # START logo no início. Com o buffer vazio os bytes são lidos diretamente
+    # de `data` (só o resto incompleto é copiado), o find() só corre depois de
+    # lixo ou de um frame inválido e o CRC é calculado sobre o payload já
+    # copiado para o frame devolvido.
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, data):
+        buf = self.buffer
+        if buf:
+            buf.extend(data)
+        else:
+            buf = data
+        frames = []
+        n = len(buf)
+        i = 0
+        while i < n:
+            if buf[i] != START_BYTE:
+                i = buf.find(START_BYTE, i)
+                if i < 0:
+                    i = n
+                    break
+            if i + 1 >= n:
+                break
+            opcode = buf[i + 1]
+            size = PAYLOAD_SIZES.get(opcode)
+            if size is None:
+                i += 1
+                continue
+            end = i + 2 + size  # posição do CRC
+            if end >= n:
+                break
+            payload = bytes(buf[i + 2:end])
+            crc = CRC8_TABLE[opcode]
+            for byte in payload:
+                crc = CRC8_TABLE[crc ^ byte]
+            if crc != buf[end]:
+                self.crc_errors += 1
+                i += 1
+                continue
+            frames.append((opcode, payload))
+            i = end + 1
+        if buf is self.buffer:
+            del buf[:i]
+        elif i < n:
+            self.buffer = bytearray(buf[i:])
+        return frames
@@ -0,0 +1,79 @@
+# app/serial_link.py
+
+import time
+
+import serial
+
+from .protocol import (
+    BAUD_RATES, FrameDecoder, OP_ACK, OP_CAPS, OP_PONG,
+    baudrates_from_mask, encode_hello, encode_ping, encode_set_baud
+)
+
+FIRMWARE_BAUD_TIMEOUT = 1.0  # s sem frames válidos até o firmware voltar à taxa base
+
+def wait_for_frame(ser, decoder, opcode, timeout):
+    # Lê até chegar um frame com `opcode`; outros frames (p.ex. POS) são ignorados
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = ser.read(ser.in_waiting or 1)
+        for op, payload in decoder.feed(data):
+            if op == opcode:
+                return payload
+    return None
+
+def ping(ser, seq=0, timeout=0.2, decoder=None):
+    decoder = decoder or FrameDecoder()
+    ser.write(encode_ping(seq))
+    payload = wait_for_frame(ser, decoder, OP_PONG, timeout)
+    return payload is not None and payload[0] == seq & 0xFF
+
+def negotiate_baudrate(ser, max_baudrate=BAUD_RATES[-1], attempts=5, timeout=0.5):
+    # O firmware arranca a BAUD_RATES[0]. Pergunta as taxas suportadas, escolhe
+    # a maior comum e confirma com um PING; se falhar fica na taxa base.
+    base = BAUD_RATES[0]
+    ser.baudrate = base
+    decoder = FrameDecoder()
+
+    caps = None
+    for _ in range(attempts):  # o Arduino pode estar a reiniciar (DTR)
+        ser.write(encode_hello())
+        caps = wait_for_frame(ser, decoder, OP_CAPS, timeout)
+        if caps is not None:
+            break
+    if caps is None:
+        print("Aviso: firmware não respondeu ao HELLO, a usar 9600 baud")
+        return base
+
+    candidates = [rate for rate in baudrates_from_mask(caps[0]) if rate <= max_baudrate]
+    for rate in sorted(candidates, reverse=True):
+        if rate == base:
+            break
+        ser.write(encode_set_baud(rate))
+        ack = wait_for_frame(ser, decoder, OP_ACK, timeout)
+        if ack is None or ack[0] != BAUD_RATES.index(rate):
+            continue
+        ser.flush()
+        ser.baudrate = rate
+        ser.reset_input_buffer()
+        decoder = FrameDecoder()
+        if ping(ser, seq=rate & 0xFF, timeout=timeout, decoder=decoder):
+            return rate
+        # Sem PONG o firmware volta sozinho à taxa base
+        ser.baudrate = base
+        time.sleep(1.1 * FIRMWARE_BAUD_TIMEOUT)
+        ser.reset_input_buffer()
+        decoder = FrameDecoder()
+    return base
+
+def open_serial(port, baudrate=BAUD_RATES[0], max_baudrate=None, timeout=1):
+    # Abre a porta à taxa base e, se max_baudrate for dado, negoceia a maior
+    # taxa suportada pelos dois lados
+    try:
+        ser = serial.Serial(port, baudrate, timeout=timeout)
+    except serial.SerialException:
+        print("Erro: não foi possível abrir a porta serial")
+        return None
+    if max_baudrate and max_baudrate > baudrate:
+        rate = negotiate_baudrate(ser, max_baudrate)
+        print(f"Porta série a {rate} baud")
+    return ser
@@ -0,0 +1,114 @@
+# app/serial_worker.py
+
+import threading
+from collections import deque
+
+from .protocol import FrameDecoder, OP_POS, encode_servo, encode_servo_target, encode_servo_xy
+
+def _encode_servo_batch(servo):
+    # Frames para os alvos coalescidos {eixo: ângulo ou (ângulo, v_max, a_max)}
+    profiled = {axis: value for axis, value in servo.items() if isinstance(value, tuple)}
+    direct = {axis: value for axis, value in servo.items() if axis not in profiled}
+
+    frames = [encode_servo_target(axis, angle, max_velocity, max_accel)
+              for axis, (angle, max_velocity, max_accel) in profiled.items()]
+    if 'x' in direct and 'y' in direct:
+        frames.append(encode_servo_xy(direct['x'], direct['y']))
+    else:
+        frames.extend(encode_servo(axis, angle) for axis, angle in direct.items())
+    return frames
+
+class SerialWorker:
+    # Thread dona da porta série. A GUI/tracker só chamam os métodos submit_*
+    # (nunca bloqueiam) e leem a última posição publicada pelo Arduino.
+    #
+    # Comandos de posição absoluta são coalescidos por eixo: se chegarem
+    # vários antes de a thread escrever, só o alvo mais recente é enviado.
+    # Os restantes comandos (step, calibrar, disparo...) seguem por ordem; um
+    # comando destes fecha o lote de alvos pendentes, que sai antes dele, por
+    # isso só se coalescem alvos submetidos entre dois comandos.
+    def __init__(self, ser, poll_interval=0.005):
+        self.ser = ser
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pending_servo = {}
+        self.queue = deque()
+        self.decoder = FrameDecoder()
+
+        self.latest_position = None
+        self.position_seq = 0
+
+        self.commands_sent = 0
+        self.commands_coalesced = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    # ========== SUBMIT API (qualquer thread) ==========
+
+    def submit_servo(self, axis, angle, max_velocity=None, max_accel=None):
+        # Com max_velocity/max_accel o firmware faz o perfil até `angle`
+        if max_velocity is not None:
+            angle = (angle, max_velocity, max_accel)
+        with self.lock:
+            axis = axis.lower()
+            if axis in self.pending_servo:
+                self.commands_coalesced += 1
+            self.pending_servo[axis] = angle
+        self.wakeup.set()
+
+    def submit(self, frame):
+        with self.lock:
+            if self.pending_servo:
+                self.queue.extend(_encode_servo_batch(self.pending_servo))
+                self.pending_servo = {}
+            self.queue.append(frame)
+        self.wakeup.set()
+
+    def get_position(self):
+        # (seq, (x, y)) da última posição recebida; seq muda a cada POS novo
+        with self.lock:
+            return self.position_seq, self.latest_position
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        self.thread.join(timeout=1)
+
+    # ========== WORKER THREAD ==========
+
+    def _take_pending(self):
+        with self.lock:
+            frames = list(self.queue)
+            self.queue.clear()
+            servo = self.pending_servo
+            self.pending_servo = {}
+        frames.extend(_encode_servo_batch(servo))
+        return frames
+
+    def _read_feedback(self):
+        waiting = self.ser.in_waiting
+        if not waiting:
+            return
+        positions = [payload for opcode, payload in self.decoder.feed(self.ser.read(waiting))
+                     if opcode == OP_POS]
+        if positions:
+            x, y = positions[-1]
+            with self.lock:
+                self.latest_position = (x, y)
+                self.position_seq += 1
+
+    def _loop(self):
+        while self.running:
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+            try:
+                frames = self._take_pending()
+                if frames:
+                    self.ser.write(b"".join(frames))
+                    self.commands_sent += len(frames)
+                self._read_feedback()
+            except Exception as e:
+                print(f"Erro na thread da serial: {e}")
@@ -0,0 +1,166 @@
+# app/tracker.py
+
+import time
+
+import numpy as np
+
+from .prediction import KalmanPredictor
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None  # usa matching greedy
+
+class Track:
+    def __init__(self, track_id, bbox, timestamp=None):
+        self.id = track_id
+        self.bbox = bbox
+        self.hits = 1       # deteções associadas
+        self.lost = 0       # frames seguidos sem deteção
+        self.age = 1
+        cx, cy = self.center
+        self.predictor = KalmanPredictor(cx, cy, timestamp)
+
+    @property
+    def center(self):
+        x, y, w, h = self.bbox
+        return x + w // 2, y + h // 2
+
+    @property
+    def area(self):
+        return self.bbox[2] * self.bbox[3]
+
+    def update(self, bbox, timestamp=None):
+        self.bbox = bbox
+        self.hits += 1
+        self.lost = 0
+        self.age += 1
+        cx, cy = self.center
+        self.predictor.update(cx, cy, timestamp)
+
+    def mark_missed(self, timestamp=None):
+        self.lost += 1
+        self.age += 1
+        self.predictor.predict(timestamp)
+
+    def predicted_bbox(self, timestamp):
+        # bbox atual deslocada para a posição prevista pelo filtro
+        px, py = self.predictor.predict_position(timestamp)
+        x, y, w, h = self.bbox
+        return px - w / 2, py - h / 2, w, h
+
+    def predicted_center(self, timestamp):
+        px, py = self.predictor.predict_position(timestamp)
+        return int(round(px)), int(round(py))
+
+def _centers(boxes):
+    return boxes[:, :2] + boxes[:, 2:] / 2
+
+def iou_matrix(boxes_a, boxes_b):
+    # boxes (N, 4) em formato x, y, w, h -> matriz (N, M) de IoU
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    x1 = np.maximum(a[..., 0], b[..., 0])
+    y1 = np.maximum(a[..., 1], b[..., 1])
+    x2 = np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2])
+    y2 = np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+def _greedy_match(cost):
+    matches = []
+    used_rows, used_cols = set(), set()
+    for flat in np.argsort(cost, axis=None):
+        r, c = divmod(int(flat), cost.shape[1])
+        if not np.isfinite(cost[r, c]):
+            break
+        if r in used_rows or c in used_cols:
+            continue
+        matches.append((r, c))
+        used_rows.add(r)
+        used_cols.add(c)
+        if len(matches) == min(cost.shape):
+            break
+    return matches
+
+class MultiObjectTracker:
+    def __init__(self, max_distance=60, max_lost_frames=5, min_hits=3, max_detections=16, iou_weight=0.5):
+        self.max_distance = max_distance
+        self.max_lost_frames = max_lost_frames
+        self.min_hits = min_hits
+        # Só os N maiores blobs entram na associação, para o custo por frame
+        # não crescer com o número de blobs de ruído
+        self.max_detections = max_detections
+        self.iou_weight = iou_weight
+        self.tracks = []
+        self.next_id = 1
+
+    def reset(self):
+        self.tracks = []
+
+    def _select_detections(self, objects):
+        if not objects:
+            return np.empty((0, 4), dtype=np.float32)
+        boxes = np.array([bbox for _, bbox in objects], dtype=np.float32)
+        if len(boxes) > self.max_detections:
+            areas = boxes[:, 2] * boxes[:, 3]
+            keep = np.argpartition(-areas, self.max_detections)[:self.max_detections]
+            boxes = boxes[keep]
+        return boxes
+
+    def _match(self, track_boxes, det_boxes):
+        diff = _centers(track_boxes)[:, None, :] - _centers(det_boxes)[None, :, :]
+        dist = np.hypot(diff[..., 0], diff[..., 1])
+        iou = iou_matrix(track_boxes, det_boxes)
+
+        cost = (1 - self.iou_weight) * dist / self.max_distance + self.iou_weight * (1 - iou)
+        cost[(dist > self.max_distance) & (iou <= 0)] = np.inf
+
+        if linear_sum_assignment is not None:
+            finite = np.where(np.isfinite(cost), cost, 1e6)
+            rows, cols = linear_sum_assignment(finite)
+            return [(r, c) for r, c in zip(rows, cols) if np.isfinite(cost[r, c])]
+        return _greedy_match(cost)
+
+    def update(self, objects, timestamp=None):
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        det_boxes = self._select_detections(objects)
+        matched_tracks, matched_dets = set(), set()
+
+        if self.tracks and len(det_boxes):
+            # A associação usa a posição prevista de cada track neste instante
+            track_boxes = np.array([t.predicted_bbox(timestamp) for t in self.tracks], dtype=np.float32)
+            for r, c in self._match(track_boxes, det_boxes):
+                self.tracks[r].update(tuple(int(v) for v in det_boxes[c]), timestamp)
+                matched_tracks.add(r)
+                matched_dets.add(c)
+
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.mark_missed(timestamp)
+        self.tracks = [t for t in self.tracks if t.lost <= self.max_lost_frames]
+
+        for c in range(len(det_boxes)):
+            if c not in matched_dets:
+                self.tracks.append(Track(self.next_id, tuple(int(v) for v in det_boxes[c]), timestamp))
+                self.next_id += 1
+
+        return self.confirmed_tracks()
+
+    def confirmed_tracks(self):
+        return [t for t in self.tracks if t.hits >= self.min_hits]
+
+    def get_track(self, track_id):
+        for track in self.tracks:
+            if track.id == track_id:
+                return track
+        return None
+
+    def select_target(self, current_id=None):
+        # Mantém o alvo atual enquanto estiver confirmado; senão escolhe o maior
+        track = self.get_track(current_id) if current_id is not None else None
+        if track is not None and track.hits >= self.min_hits:
+            return track
+        confirmed = self.confirmed_tracks()
+        return max(confirmed, key=lambda t: t.area) if confirmed else None
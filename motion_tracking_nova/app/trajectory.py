@@ -0,0 +1,70 @@
+# app/trajectory.py
+
+from PyQt5.QtCore import QTimer
+
+class TrajectoryStreamer:
+    # Um único gerador de trajetória para os dois eixos: cada eixo tem um só
+    # alvo ativo, que é substituído quando chega um novo, e um timer a taxa fixa
+    # emite um setpoint por eixo em movimento. O número de timers e o tráfego
+    # série ficam limitados por muito que o tracker mude de alvo.
+    def __init__(self, send, interval_ms=30, max_step=2):
+        self.send = send
+        self.interval_ms = interval_ms
+        self.max_step = max_step
+        self.positions = {}
+        self.targets = {}
+        self.timer = None
+
+    def _ensure_timer(self):
+        # Criado só no primeiro uso, já com a QApplication a correr
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.timeout.connect(self._tick)
+        if not self.timer.isActive():
+            self.timer.start(self.interval_ms)
+
+    def set_rate(self, interval_ms, max_step):
+        # Mudar interval_ms diretamente não afeta um timer já a correr: aqui o
+        # timer ativo é reiniciado com o novo intervalo
+        self.max_step = max_step
+        if interval_ms == self.interval_ms:
+            return
+        self.interval_ms = interval_ms
+        if self.timer is not None and self.timer.isActive():
+            self.timer.start(interval_ms)
+
+    def is_moving(self, axis):
+        return axis in self.targets
+
+    def set_target(self, axis, target, current=None):
+        # Enquanto o eixo está em movimento a posição de referência é a do
+        # próprio streamer; parado, aceita a posição atual dada (slider/feedback)
+        if not self.is_moving(axis) and current is not None:
+            self.positions[axis] = current
+        if axis not in self.positions:
+            self.positions[axis] = target
+
+        if self.positions[axis] == target:
+            self.targets.pop(axis, None)
+            return
+        self.targets[axis] = target
+        self._ensure_timer()
+
+    def stop(self, axis=None):
+        if axis is None:
+            self.targets.clear()
+        else:
+            self.targets.pop(axis, None)
+
+    def _tick(self):
+        for axis, target in list(self.targets.items()):
+            position = self.positions[axis]
+            delta = max(-self.max_step, min(self.max_step, target - position))
+            position += delta
+            self.positions[axis] = position
+            self.send(axis, position)
+            if position == target:
+                del self.targets[axis]
+
+        if not self.targets:
+            self.timer.stop()
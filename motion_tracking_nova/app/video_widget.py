@@ -0,0 +1,64 @@
+# app/video_widget.py
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+# Os frames da câmara são mostrados como BGR888 (Qt >= 5.14): o QImage usa
+# o buffer tal como está, sem cvtColor. Em Qt mais antigo a troca de canais
+# é feita com cvtColor para o mesmo buffer fixo.
+HAS_BGR888 = hasattr(QImage, "Format_BGR888")
+
+class VideoWidget(QWidget):
+    # Preview de frames numpy (h, w, 3). Há um único buffer e um único QImage
+    # a embrulhá-lo, criados quando o tamanho do frame muda; cada frame é só
+    # copiado para o buffer (ou desenhado lá diretamente via frame_buffer()).
+    # O paintEvent escala a imagem para o widget, mantendo a proporção, sem
+    # criar QPixmaps.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.buffer = None
+        self.image = None
+        self.frames_shown = 0
+
+    def _allocate(self, shape):
+        h, w = shape[:2]
+        self.buffer = np.empty((h, w, 3), np.uint8)
+        image_format = QImage.Format_BGR888 if HAS_BGR888 else QImage.Format_RGB888
+        # O QImage não copia: aponta para self.buffer, que vive tanto quanto ele
+        self.image = QImage(self.buffer.data, w, h, 3 * w, image_format)
+
+    def frame_buffer(self, shape):
+        # Buffer de display do tamanho pedido, para desenhar sem cópia extra
+        if self.buffer is None or self.buffer.shape[:2] != tuple(shape[:2]):
+            self._allocate(shape)
+        return self.buffer
+
+    def show_frame(self, frame):
+        buffer = self.frame_buffer(frame.shape)
+        if not HAS_BGR888:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buffer)
+        elif frame is not buffer:
+            np.copyto(buffer, frame)
+        self.frames_shown += 1
+        self.update()
+
+    def target_rect(self):
+        # Retângulo centrado com a proporção da imagem
+        w, h = self.image.width(), self.image.height()
+        scale = min(self.width() / w, self.height() / h)
+        tw, th = int(w * scale), int(h * scale)
+        return QRect((self.width() - tw) // 2, (self.height() - th) // 2, tw, th)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self.image is not None:
+            # Escala por vizinho mais próximo: barata no CPU do Pi
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+            painter.drawImage(self.target_rect(), self.image)
+        painter.end()
@@ -1,4 +1,6 @@
-from PyQt5.QtWidgets import QSlider, QLabel, QVBoxLayout, QGroupBox
+from PyQt5.QtWidgets import (
+    QSlider, QLabel, QVBoxLayout, QGroupBox, QComboBox, QDoubleSpinBox, QFormLayout
+)
 from PyQt5.QtCore import Qt
 
 def create_tracker_group(initial_value=3, callback=None):
@@ -19,3 +21,51 @@ def create_tracker_group(initial_value=3, callback=None):
     group.setLayout(layout)
 
     return slider, label, group
+
+def create_detector_group(backends, initial=None, callback=None,
+                          extractors=(), initial_extractor=None, extractor_callback=None):
+    combo = QComboBox()
+    combo.addItems(backends)
+    if initial is not None:
+        combo.setCurrentText(initial)
+
+    if callback:
+        combo.currentTextChanged.connect(callback)
+
+    extractor_combo = QComboBox()
+    extractor_combo.addItems(extractors)
+    if initial_extractor is not None:
+        extractor_combo.setCurrentText(initial_extractor)
+
+    if extractor_callback:
+        extractor_combo.currentTextChanged.connect(extractor_callback)
+
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel("Detetor de movimento"))
+    layout.addWidget(combo)
+    layout.addWidget(QLabel("Extração de objetos"))
+    layout.addWidget(extractor_combo)
+
+    group = QGroupBox("Deteção")
+    group.setLayout(layout)
+
+    return combo, extractor_combo, group
+
+def create_pid_group(kp, ki, kd, callback=None):
+    layout = QFormLayout()
+    spins = {}
+    for name, value in (("kp", kp), ("ki", ki), ("kd", kd)):
+        spin = QDoubleSpinBox()
+        spin.setRange(0.0, 50.0)
+        spin.setDecimals(3)
+        spin.setSingleStep(0.05)
+        spin.setValue(value)
+        if callback:
+            spin.valueChanged.connect(lambda v, n=name: callback(n, v))
+        layout.addRow(name.upper(), spin)
+        spins[name] = spin
+
+    group = QGroupBox("Controlador PID")
+    group.setLayout(layout)
+
+    return spins, group
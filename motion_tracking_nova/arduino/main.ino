@@ -6,14 +6,69 @@ Servo servo3; // Missile trigger
 
 float pos1 = 90; // current X
 float pos2 = 90; // current Y
-int wait = 20;   // ms delay between actions
+int wait = 20;   // ms, base unit for the missile sequence timing
 float passo = 0.5; // small increment step
 
 unsigned long lastFeedbackTime = 0;
 const unsigned long feedbackInterval = 100; // ms
 
+// ===== Binary protocol (see app/protocol.py) =====
+// Frame: START | OPCODE | PAYLOAD | CRC8(OPCODE + PAYLOAD)
+const byte START_BYTE = 0xA5;
+
+const byte OP_SERVO_X = 0x01;
+const byte OP_SERVO_Y = 0x02;
+const byte OP_SERVO_XY = 0x03;
+const byte OP_STEP = 0x04;
+const byte OP_CALIBRATE = 0x05;
+const byte OP_PING = 0x06;
+const byte OP_HELLO = 0x07;
+const byte OP_SET_BAUD = 0x08;
+const byte OP_SERVO_TARGET = 0x09;
+const byte OP_POS = 0x81;
+const byte OP_PONG = 0x82;
+const byte OP_CAPS = 0x83;
+const byte OP_ACK = 0x84;
+
+// Baud rate negotiation: always boot at BAUD_RATES[0]
+const unsigned long BAUD_RATES[] = {9600, 115200, 250000, 500000};
+const byte BAUD_RATE_COUNT = 4;
+const byte SUPPORTED_BAUD_MASK = 0x0F; // all exact (0-2% error) at 16 MHz
+const unsigned long BAUD_CONFIRM_TIMEOUT = 1000; // ms, revert if no valid frame
+bool baudPending = false;
+unsigned long baudChangeTime = 0;
+
+const byte MAX_PAYLOAD = 6;
+
+enum ParserState { WAIT_START, WAIT_OPCODE, READ_PAYLOAD, WAIT_CRC };
+ParserState parserState = WAIT_START;
+byte rxOpcode = 0;
+byte rxPayload[MAX_PAYLOAD];
+byte rxExpected = 0;
+byte rxCount = 0;
+
+// ===== On-device trapezoidal profiles (OP_SERVO_TARGET) =====
+// The host sends only the target and the velocity/acceleration limits;
+// loop() advances the profile with micros(), without blocking.
+struct AxisProfile {
+  float target;
+  float vel;   // deg/s
+  float vmax;  // deg/s
+  float amax;  // deg/s^2
+  bool active;
+};
+AxisProfile profileX = {90, 0, 0, 0, false};
+AxisProfile profileY = {90, 0, 0, 0, false};
+unsigned long lastProfileMicros = 0;
+
+// ===== Missile sequence (non-blocking) =====
+// 180 -> 0 -> 90, each phase held for 5 * wait ms, advanced from loop()
+enum MissileState { MISSILE_IDLE, MISSILE_FORWARD, MISSILE_BACK };
+MissileState missileState = MISSILE_IDLE;
+unsigned long missilePhaseStart = 0;
+
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(BAUD_RATES[0]);
   servo1.attach(2);
   servo2.attach(3);
   servo3.attach(4);
@@ -22,6 +77,57 @@ void setup() {
   servo1.write(pos1);
   servo2.write(pos2);
   servo3.write(90); // Neutral position
+  lastProfileMicros = micros();
+}
+
+void cancelProfile(AxisProfile &p) {
+  p.active = false;
+  p.vel = 0;
+}
+
+void stepProfile(AxisProfile &p, float &pos, Servo &servo, float dt) {
+  if (!p.active) return;
+
+  float dist = p.target - pos;
+  float dir = dist > 0 ? 1 : -1;
+  float stopDist = p.vel * p.vel / (2 * p.amax);
+
+  // Brake when the remaining distance is within the stopping distance
+  if (p.vel * dir > 0 && fabs(dist) <= stopDist) {
+    p.vel -= dir * p.amax * dt;
+  } else {
+    p.vel += dir * p.amax * dt;
+  }
+  p.vel = constrain(p.vel, -p.vmax, p.vmax);
+
+  float next = pos + p.vel * dt;
+  // Arrived (or would overshoot): snap to the target and stop
+  if ((p.target - next) * dir <= 0 || fabs(dist) < 0.05) {
+    next = p.target;
+    cancelProfile(p);
+  }
+  pos = constrain(next, 0, 180);
+  servo.write((int)(pos + 0.5));
+}
+
+void updateProfiles() {
+  unsigned long now = micros();
+  float dt = (now - lastProfileMicros) * 1e-6;
+  lastProfileMicros = now;
+  if (dt > 0.05) dt = 0.05; // after a long pause don't jump
+  stepProfile(profileX, pos1, servo1, dt);
+  stepProfile(profileY, pos2, servo2, dt);
+}
+
+void startProfile(const byte *payload) {
+  AxisProfile &p = payload[0] == 1 ? profileY : profileX;
+  unsigned int vmax = payload[2] | (payload[3] << 8);
+  unsigned int amax = payload[4] | (payload[5] << 8);
+  p.target = constrain(payload[1], 0, 180);
+  p.vmax = max(vmax, 1u);
+  p.amax = max(amax, 1u);
+  // Keep the current velocity when retargeting mid-move
+  p.active = true;
 }
 
 void movement1(int signal) {
@@ -43,63 +149,191 @@ void movement2(int signal) {
 }
 
 void missile(int signal) {
-  if (signal == 1) {
+  // A fire request during a running sequence is ignored
+  if (signal == 1 && missileState == MISSILE_IDLE) {
     servo3.write(180);
-    delay(5 * wait);
+    missileState = MISSILE_FORWARD;
+    missilePhaseStart = millis();
+  }
+}
+
+void updateMissile() {
+  if (missileState == MISSILE_IDLE) return;
+  unsigned long now = millis();
+  if (now - missilePhaseStart < (unsigned long)(5 * wait)) return;
+
+  if (missileState == MISSILE_FORWARD) {
     servo3.write(0);
-    delay(5 * wait);
+    missileState = MISSILE_BACK;
+  } else {
     servo3.write(90);
+    missileState = MISSILE_IDLE;
   }
+  missilePhaseStart = now;
+}
+
+byte crc8Update(byte crc, byte data) {
+  crc ^= data;
+  for (byte i = 0; i < 8; i++) {
+    crc = (crc & 0x80) ? (byte)((crc << 1) ^ 0x07) : (byte)(crc << 1);
+  }
+  return crc;
+}
+
+// Returns the payload size for a known opcode, or -1 if unknown
+int payloadSize(byte opcode) {
+  switch (opcode) {
+    case OP_SERVO_X: return 1;
+    case OP_SERVO_Y: return 1;
+    case OP_SERVO_XY: return 2;
+    case OP_STEP: return 1;
+    case OP_CALIBRATE: return 0;
+    case OP_PING: return 1;
+    case OP_HELLO: return 0;
+    case OP_SET_BAUD: return 1;
+    case OP_SERVO_TARGET: return 6;
+    default: return -1;
+  }
+}
+
+void sendFrame(byte opcode, const byte *payload, byte len) {
+  byte frame[2 + MAX_PAYLOAD + 1];
+  byte crc = crc8Update(0, opcode);
+  frame[0] = START_BYTE;
+  frame[1] = opcode;
+  for (byte i = 0; i < len; i++) {
+    frame[2 + i] = payload[i];
+    crc = crc8Update(crc, payload[i]);
+  }
+  frame[2 + len] = crc;
+  Serial.write(frame, 3 + len);
 }
 
 void sendPositionFeedback() {
   unsigned long now = millis();
   if (now - lastFeedbackTime > feedbackInterval) {
-    Serial.print("POS:");
-    Serial.print((int)pos1);
-    Serial.print(":");
-    Serial.println((int)pos2);
+    byte payload[2] = { (byte)pos1, (byte)pos2 };
+    sendFrame(OP_POS, payload, 2);
     lastFeedbackTime = now;
   }
 }
 
-void loop() {
-  // Process all available commands in buffer
-  while (Serial.available() > 0) {
-    String input = Serial.readStringUntil('\n');
-    input.trim(); // removes trailing newline, etc.
+void changeBaudRate(unsigned long rate) {
+  Serial.flush(); // let pending bytes (the ACK) leave at the old rate
+  Serial.end();
+  Serial.begin(rate);
+}
 
-    if (input.startsWith("SERVOX:")) {
-      int angle = input.substring(7).toInt();
-      pos1 = constrain(angle, 0, 180);
-      servo1.write(pos1);
+void handleCommand(byte opcode, const byte *payload) {
+  baudPending = false; // any valid frame confirms the current baud rate
+  switch (opcode) {
+    case OP_PING:
+      sendFrame(OP_PONG, payload, 1);
+      break;
+    case OP_HELLO: {
+      byte mask = SUPPORTED_BAUD_MASK;
+      sendFrame(OP_CAPS, &mask, 1);
+      break;
     }
-    else if (input.startsWith("SERVOY:")) {
-      int angle = input.substring(7).toInt();
-      pos2 = constrain(angle, 0, 180);
+    case OP_SET_BAUD:
+      if (payload[0] < BAUD_RATE_COUNT && (SUPPORTED_BAUD_MASK & (1 << payload[0]))) {
+        sendFrame(OP_ACK, payload, 1);
+        changeBaudRate(BAUD_RATES[payload[0]]);
+        baudPending = true;
+        baudChangeTime = millis();
+      }
+      break;
+    case OP_SERVO_TARGET:
+      startProfile(payload);
+      break;
+    case OP_SERVO_X:
+      cancelProfile(profileX);
+      pos1 = constrain(payload[0], 0, 180);
+      servo1.write(pos1);
+      break;
+    case OP_SERVO_Y:
+      cancelProfile(profileY);
+      pos2 = constrain(payload[0], 0, 180);
       servo2.write(pos2);
-    }
-    else if (input == "CALIBRAR") {
+      break;
+    case OP_SERVO_XY:
+      cancelProfile(profileX);
+      cancelProfile(profileY);
+      pos1 = constrain(payload[0], 0, 180);
+      pos2 = constrain(payload[1], 0, 180);
+      servo1.write(pos1);
+      servo2.write(pos2);
+      break;
+    case OP_CALIBRATE:
+      cancelProfile(profileX);
+      cancelProfile(profileY);
       pos1 = 100;
       pos2 = 90;
       servo1.write(pos1);
       servo2.write(pos2);
+      break;
+    case OP_STEP: {
+      byte packed = payload[0];
+      // Only an axis that actually steps drops its profile: a fire-only STEP
+      // must not stop a SERVO_TARGET sent just before it
+      if ((packed & 0x03) != 0) cancelProfile(profileX);
+      if (((packed >> 2) & 0x03) != 0) cancelProfile(profileY);
+      movement1(packed & 0x03);        // X movement
+      movement2((packed >> 2) & 0x03); // Y movement
+      missile((packed >> 4) & 0x01);   // Missile (starts the sequence)
+      break;
+    }
+  }
+}
+
+// Byte-wise parser: no String, no heap allocation
+void parseByte(byte b) {
+  switch (parserState) {
+    case WAIT_START:
+      if (b == START_BYTE) parserState = WAIT_OPCODE;
+      break;
+    case WAIT_OPCODE: {
+      int size = payloadSize(b);
+      if (size < 0) {
+        parserState = (b == START_BYTE) ? WAIT_OPCODE : WAIT_START;
+        break;
+      }
+      rxOpcode = b;
+      rxExpected = size;
+      rxCount = 0;
+      parserState = size > 0 ? READ_PAYLOAD : WAIT_CRC;
+      break;
     }
-    else if (input.length() >= 7 && input.charAt(0) == '[' && input.charAt(6) == ']') {
-      int signal1 = input.charAt(1) - '0'; // X movement
-      int signal2 = input.charAt(3) - '0'; // Y movement
-      int signal3 = input.charAt(5) - '0'; // Missile
-      movement1(signal1);
-      delay(wait);
-      movement2(signal2);
-      delay(wait);
-      missile(signal3);
+    case READ_PAYLOAD:
+      rxPayload[rxCount++] = b;
+      if (rxCount >= rxExpected) parserState = WAIT_CRC;
+      break;
+    case WAIT_CRC: {
+      byte crc = crc8Update(0, rxOpcode);
+      for (byte i = 0; i < rxExpected; i++) crc = crc8Update(crc, rxPayload[i]);
+      if (crc == b) handleCommand(rxOpcode, rxPayload);
+      parserState = WAIT_START;
+      break;
     }
+  }
+}
+
+// Cooperative main loop: every task below only checks its own timer and
+// returns immediately, so no pass ever blocks and the serial buffer is
+// drained completely on every iteration.
+void loop() {
+  // Process all available bytes in buffer
+  while (Serial.available() > 0) {
+    parseByte(Serial.read());
+  }
 
-    // Optional: print for debugging
-    // Serial.println("Received: " + input);
+  // Host never confirmed the new rate: fall back to the boot rate
+  if (baudPending && millis() - baudChangeTime > BAUD_CONFIRM_TIMEOUT) {
+    changeBaudRate(BAUD_RATES[0]);
+    baudPending = false;
   }
 
+  updateProfiles();
+  updateMissile();
   sendPositionFeedback(); // Periodically update GUI with position
-  delay(wait); // Stability delay
 }
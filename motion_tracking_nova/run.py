@@ -1,14 +1,49 @@
 # run.py
 
+import argparse
 import sys
-from PyQt5.QtWidgets import QApplication
-from app import MotionTrackingApp
 
-def main():
+def run_gui():
+    from PyQt5.QtWidgets import QApplication
+    from app import MotionTrackingApp, TrackingEngine
+    from app.control import connect_serial
+
     app = QApplication(sys.argv)
-    window = MotionTrackingApp()
+    window = MotionTrackingApp(TrackingEngine(serial_worker=connect_serial()))
     window.show()
     sys.exit(app.exec())
 
+def run_headless(args):
+    # Sem display: só QtCore para os timers do controlo e os sinais
+    from PyQt5.QtCore import QCoreApplication
+    from app import TrackingEngine
+    from app.control import connect_serial
+
+    app = QCoreApplication(sys.argv)  # noqa: F841 (os timers precisam da instância)
+    engine = TrackingEngine(serial_worker=connect_serial())
+    engine.set_direct_aim(args.direct_aim)
+    engine.set_tracking(True)
+    try:
+        engine.run(duration=args.duration, stats_interval=args.stats_interval)
+    finally:
+        engine.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headless", action="store_true",
+                        help="corre o tracking sem janela e mostra estatísticas")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="segundos a correr em modo headless (por omissão até Ctrl+C)")
+    parser.add_argument("--stats-interval", type=float, default=5.0,
+                        help="intervalo (s) entre relatórios em modo headless")
+    parser.add_argument("--direct-aim", action="store_true",
+                        help="apontar com o modelo da câmara em vez do PID")
+    args = parser.parse_args()
+
+    if args.headless:
+        run_headless(args)
+    else:
+        run_gui()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,124 @@
+# tools/alloc_counter.py
+#
+# Conta as alocações do pipeline por frame com tracemalloc (o numpy regista
+# lá os buffers dos arrays, incluindo os que o OpenCV devolve):
+#   - pico de memória alocada durante um frame, acima do que já estava vivo
+#   - crescimento líquido ao fim de N frames
+#   - os blocos ainda vivos criados no último frame, por linha
+# para o pipeline antigo (cvtColor, downscale_frame, copy() do frame
+# anterior, absdiff/threshold novos, frame[mask > 0]) e para o atual (buffers
+# pré-alocados e dst=).
+#
+# Uso: python tools/alloc_counter.py [--frames N] [--warmup N]
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.detection import (  # noqa: E402
+    FrameDiffDetector, FrameDownscaler, MaskCleanup, downscale_frame, extract_motion_objects
+)
+from app.overlay import OverlayCompositor  # noqa: E402
+
+def make_frames(n, w=640, h=480):
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 200, (h, w, 3), dtype=np.uint8)
+    frames = []
+    for i in range(n):
+        frame = background.copy()
+        x = 50 + (7 * i) % (w - 200)
+        cv2.rectangle(frame, (x, h // 3), (x + 120, h // 3 + 100), (255, 255, 255), -1)
+        frames.append(frame)
+    return frames
+
+class LegacyPipeline:
+    # Equivalente ao update_frame antes dos buffers pré-alocados
+    def __init__(self):
+        self.previous = None
+
+    def step(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = downscale_frame(gray, 0.5)
+        previous, self.previous = self.previous, gray.copy()
+        if previous is None:
+            return
+        diff = cv2.absdiff(previous, gray)
+        _, mask = cv2.threshold(diff, 5, 255, cv2.THRESH_BINARY)
+        extract_motion_objects(mask, 6000, 0.5)
+        display = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        mask = cv2.resize(mask, (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_NEAREST)
+        display[mask > 0] = (0, 255, 0)
+
+class BufferedPipeline:
+    # O caminho atual do update_frame
+    def __init__(self):
+        self.gray = None
+        self.display = None
+        self.downscaler = FrameDownscaler()
+        self.detector = FrameDiffDetector(extractor="components", cleanup=MaskCleanup())
+        self.overlay = OverlayCompositor()
+
+    def step(self, frame):
+        if self.gray is None:
+            self.gray = np.empty(frame.shape[:2], np.uint8)
+            self.display = np.empty_like(frame)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        gray = self.downscaler.downscale(gray, 0.5)
+        _, mask, _ = self.detector.detect(gray, 5, 6000, 0.5)
+        np.copyto(self.display, frame)
+        self.overlay.render(self.display, (), mask)
+
+def measure(pipeline, frames, warmup):
+    for frame in frames[:warmup]:
+        pipeline.step(frame)
+
+    measured = frames[warmup:]
+    peaks = np.zeros(len(measured), np.int64)
+    tracemalloc.start(10)
+    start_current, _ = tracemalloc.get_traced_memory()
+    for i, frame in enumerate(measured[:-1]):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        pipeline.step(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[i] = peak - before
+    end_current, _ = tracemalloc.get_traced_memory()
+
+    snapshot_before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    pipeline.step(measured[-1])
+    _, peak = tracemalloc.get_traced_memory()
+    peaks[-1] = peak - before
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    top = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(
+        snapshot_before.filter_traces(ignore), "lineno")
+    tracemalloc.stop()
+    return peaks, end_current - start_current, top
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames + args.warmup)
+    for name, pipeline in (("antigo", LegacyPipeline()), ("buffers", BufferedPipeline())):
+        peaks, growth, top = measure(pipeline, frames, args.warmup)
+        print(f"{name}:")
+        print(f"  pico por frame  : média {peaks.mean() / 1024:8.1f} KiB, máx {peaks.max() / 1024:8.1f} KiB")
+        # A imagem mais pequena do pipeline (320x240) tem 75 KiB
+        print(f"  frames que alocam imagens (> 16 KiB): {int((peaks > 16384).sum())}/{len(peaks)}")
+        print(f"  crescimento em {len(peaks) - 1} frames: {growth / 1024:.1f} KiB")
+        for stat in top[:3]:
+            if stat.size_diff:
+                print(f"    {stat}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# tools/bench_command_rate.py
+#
+# Mede a taxa de comandos STEP (o antigo "[x,y,z]") que o firmware aguenta
+# de forma sustentada. Com --port mede o Arduino real; sem isso compara, no
+# emulador, o modelo do firmware antigo (delay() em cada comando e no fim do
+# loop) com o loop não bloqueante atual.
+#
+# Uso: python tools/bench_command_rate.py [--port /dev/ttyACM0] [--baud 115200]
+
+import argparse
+import os
+import sys
+
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.protocol import encode_step  # noqa: E402
+from app.serial_link import negotiate_baudrate  # noqa: E402
+from bench_serial import measure_command_rate  # noqa: E402
+from firmware_emulator import FirmwareEmulator  # noqa: E402
+
+WAIT = 0.020  # `wait` do firmware, em segundos
+
+def step_command(i):
+    # Alterna X+ / X- para o servo não chegar ao limite
+    return encode_step(1 + i % 2, 0, 0)
+
+def bench_port(port, baud, seconds):
+    ser = serial.Serial(port, 9600, timeout=0.1)
+    rate = negotiate_baudrate(ser, max_baudrate=baud)
+    cmds = measure_command_rate(ser, seconds, batch=10, make_command=step_command)
+    ser.close()
+    return rate, cmds
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", help="porta do Arduino; sem isto usa o emulador")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.port:
+        rate, cmds = bench_port(args.port, args.baud, args.seconds)
+        print(f"{args.port} a {rate} baud: {cmds:.0f} comandos STEP/s")
+        return
+
+    models = [
+        ("firmware antigo (delay)", dict(step_delay=2 * WAIT, loop_delay=WAIT)),
+        ("loop não bloqueante", dict()),
+    ]
+    for name, options in models:
+        with FirmwareEmulator(**options) as emulator:
+            rate, cmds = bench_port(emulator.port, args.baud, args.seconds)
+        print(f"{name:25s} a {rate} baud: {cmds:8.0f} comandos STEP/s")
+
+if __name__ == "__main__":
+    main()
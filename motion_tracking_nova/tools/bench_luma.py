@@ -0,0 +1,59 @@
+# tools/bench_luma.py
+#
+# Compara os dois caminhos para obter a imagem em cinzento usada na deteção:
+#   - cvtColor(BGR -> GRAY) do frame principal (caminho antigo)
+#   - vista do plano Y de um buffer YUV420 (CameraManager.get_luma)
+#
+# Uso: python tools/bench_luma.py [--iters N]
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+RESOLUTIONS = [(640, 480), (1280, 720)]
+
+def time_per_call(fn, iters):
+    fn()  # aquecimento
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) / iters * 1000
+
+def bench_resolution(w, h, iters):
+    rng = np.random.default_rng(0)
+    bgr = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    yuv420 = rng.integers(0, 256, (h * 3 // 2, w), dtype=np.uint8)
+    previous = rng.integers(0, 256, (h, w), dtype=np.uint8)
+
+    def cvt_path():
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        return cv2.absdiff(previous, gray)
+
+    def luma_path():
+        gray = yuv420[:h, :w]
+        return cv2.absdiff(previous, gray)
+
+    cvt_ms = time_per_call(lambda: cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY), iters)
+    luma_ms = time_per_call(lambda: yuv420[:h, :w], iters)
+    cvt_diff_ms = time_per_call(cvt_path, iters)
+    luma_diff_ms = time_per_call(luma_path, iters)
+
+    print(f"{w}x{h}")
+    print(f"  cvtColor BGR2GRAY       : {cvt_ms:8.3f} ms")
+    print(f"  plano Y (vista)         : {luma_ms:8.3f} ms")
+    print(f"  cvtColor + absdiff      : {cvt_diff_ms:8.3f} ms")
+    print(f"  plano Y + absdiff       : {luma_diff_ms:8.3f} ms")
+    print(f"  ganho por frame         : {cvt_diff_ms - luma_diff_ms:8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iters", type=int, default=500)
+    args = parser.parse_args()
+
+    for w, h in RESOLUTIONS:
+        bench_resolution(w, h, args.iters)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# tools/bench_motion_mask.py
+#
+# Compara as duas formas de transformar a máscara de movimento em objetos:
+#   - findContours + contourArea/boundingRect por contour (contours)
+#   - connectedComponentsWithStats com filtro vetorizado (components)
+# em máscaras com um alvo grande e um número crescente de blobs de ruído.
+#
+# Depois mede o efeito do MaskCleanup num par de frames com ruído de sensor
+# e threshold baixo: contours por frame e tempo total (diff + threshold +
+# limpeza + extração) para cada configuração.
+#
+# Uso: python tools/bench_motion_mask.py [--iters N] [--scale S] [--threshold T]
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.detection import OBJECT_EXTRACTORS, MaskCleanup, detect_motion_objects  # noqa: E402
+
+def make_mask(w, h, noise_blobs, seed=0):
+    # Um alvo retangular e `noise_blobs` manchas pequenas espalhadas
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((h, w), np.uint8)
+    cv2.rectangle(mask, (w // 3, h // 3), (w // 3 + w // 6, h // 3 + h // 4), 255, -1)
+    xs = rng.integers(0, w, noise_blobs)
+    ys = rng.integers(0, h, noise_blobs)
+    radii = rng.integers(1, 3, noise_blobs)
+    for x, y, r in zip(xs, ys, radii):
+        cv2.circle(mask, (int(x), int(y)), int(r), 255, -1)
+    return mask
+
+def make_frame_pair(w, h, noise_sigma, seed=0):
+    # Mesma cena com ruído gaussiano independente e um alvo que se desloca
+    rng = np.random.default_rng(seed)
+    scene = rng.integers(40, 200, (h, w)).astype(np.uint8)
+    scene = cv2.GaussianBlur(scene, (0, 0), 3)
+    frames = []
+    for shift in (0, w // 40):
+        frame = scene.astype(np.float32) + rng.normal(0, noise_sigma, (h, w))
+        x0 = w // 3 + shift
+        frame[h // 3:h // 3 + h // 4, x0:x0 + w // 6] = 230
+        frames.append(np.clip(frame, 0, 255).astype(np.uint8))
+    return frames
+
+CLEANUP_CONFIGS = [
+    ("sem limpeza", None),
+    ("abertura 3", MaskCleanup(open_size=3, close_size=0)),
+    ("abertura 3 + fecho 5", MaskCleanup(open_size=3, close_size=5)),
+    ("mediana 3 + ab. 3 + fe. 5", MaskCleanup(open_size=3, close_size=5, median_blur=3)),
+]
+
+def count_contours(mask):
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return len(contours)
+
+def time_per_call(fn, iters):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - start) / iters * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iters", type=int, default=200)
+    parser.add_argument("--scale", type=float, default=0.5,
+                        help="escala da máscara em relação ao display (como detection_scale)")
+    parser.add_argument("--distinction-threshold", type=float, default=6000)
+    parser.add_argument("--threshold", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=3.0, help="sigma do ruído de sensor")
+    args = parser.parse_args()
+
+    w, h = int(640 * args.scale), int(480 * args.scale)
+    print(f"máscara {w}x{h}, distinction_threshold={args.distinction_threshold}")
+    for noise_blobs in (0, 50, 200, 1000, 3000):
+        mask = make_mask(w, h, noise_blobs)
+        results = []
+        for name, extract in OBJECT_EXTRACTORS.items():
+            ms = time_per_call(lambda: extract(mask, args.distinction_threshold, args.scale), args.iters)
+            objects, largest = extract(mask, args.distinction_threshold, args.scale)
+            results.append(f"{name} {ms:7.3f} ms ({len(objects)} obj)")
+        print(f"  {noise_blobs:5d} blobs de ruído: " + "  |  ".join(results))
+
+    print(f"\nlimpeza da máscara, threshold={args.threshold}, ruído sigma={args.noise}")
+    previous, current = make_frame_pair(w, h, args.noise)
+    for label, cleanup in CLEANUP_CONFIGS:
+        def step(extractor="contours"):
+            a, b = previous, current
+            if cleanup is not None:
+                a, b = cleanup.prefilter(a), cleanup.prefilter(b)
+            return detect_motion_objects(a, b, args.threshold, args.distinction_threshold,
+                                         args.scale, extractor, cleanup)
+
+        _, mask, _ = step()
+        line = f"  {label:26s}: {count_contours(mask):6d} contours"
+        for name in OBJECT_EXTRACTORS:
+            line += f"  |  {name} {time_per_call(lambda: step(name), args.iters):7.3f} ms"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# tools/bench_pid_step.py
+#
+# Resposta a um degrau do PIDController de um eixo, simulada com os tempos
+# reais do sistema:
+#   - frames a --fps; o erro de cada frame (em píxeis) só chega ao
+#     controlador --latency segundos depois da captura
+#   - malha do PanTiltController a --rate Hz, que integra a saída do PID e
+#     envia ângulos inteiros ao servo
+#   - --ppd píxeis por grau (640 px / 53.5 graus de FOV ~ 12)
+# O alvo está parado a --step graus da posição inicial do servo. Para cada
+# conjunto de ganhos mostra a sobreelevação, o tempo até ficar dentro de
+# --tolerance graus (sem voltar a sair) e o erro no fim.
+#
+# Uso: python tools/bench_pid_step.py [--step 20] [--latency 0.04] [--kp 1.0 --ki 0.2 --kd 0.0]
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.camera_model import DEFAULT_FOV  # noqa: E402
+from app.controller import PIDController  # noqa: E402
+
+GAINS = [
+    (3.0, 0.5, 0.05),   # antigos valores por omissão
+    (2.0, 0.3, 0.05),
+    (1.5, 0.3, 0.0),
+    (1.0, 0.2, 0.0),
+    (0.8, 0.1, 0.0),
+    (0.6, 0.1, 0.0),
+]
+
+def simulate(pid, step, fps, latency, rate_hz, ppd, duration=3.0):
+    # Devolve [(t, posição do servo)] a cada tick da malha de controlo
+    dt = 1.0 / rate_hz
+    target = step
+    position = 0.0
+    sent = 0
+    frames = []      # (instante em que o erro chega, erro em px)
+    next_frame = 0.0
+    error = None
+    trace = []
+    t = 0.0
+    while t < duration:
+        # Capturas até agora: o erro usa a posição do servo no instante da captura
+        while next_frame <= t:
+            frames.append((next_frame + latency, (target - sent) * ppd))
+            next_frame += 1.0 / fps
+        while frames and frames[0][0] <= t:
+            error = frames.pop(0)[1]
+
+        if error is not None:
+            rate = pid.update(error, dt)
+            position = max(0.0, min(180.0, position + rate * dt))
+            sent = int(round(position))
+        trace.append((t, sent))
+        t += dt
+    return trace
+
+def step_metrics(trace, step, tolerance):
+    overshoot = max(0.0, max(angle for _, angle in trace) - step)
+    settle = None
+    for t, angle in trace:
+        if abs(angle - step) > tolerance:
+            settle = None
+        elif settle is None:
+            settle = t
+    return overshoot, settle, trace[-1][1] - step
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--step", type=float, default=20.0, help="graus")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--latency", type=float, default=0.04, help="captura -> erro no controlador (s)")
+    parser.add_argument("--rate", type=float, default=50.0, help="taxa da malha (Hz)")
+    parser.add_argument("--ppd", type=float, default=640 / DEFAULT_FOV[0], help="píxeis por grau")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="graus")
+    parser.add_argument("--kp", type=float)
+    parser.add_argument("--ki", type=float, default=0.0)
+    parser.add_argument("--kd", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.kp is not None:
+        gains = [(args.kp, args.ki, args.kd)]
+    else:
+        default = PIDController()
+        gains = [(default.kp, default.ki, default.kd)] + [g for g in GAINS if g != (default.kp, default.ki, default.kd)]
+    print(f"degrau de {args.step:.0f} graus, {args.fps:.0f} fps, latência {args.latency * 1000:.0f} ms, "
+          f"malha a {args.rate:.0f} Hz, {args.ppd:.1f} px/grau")
+    for kp, ki, kd in gains:
+        pid = PIDController(kp=kp, ki=ki, kd=kd)
+        trace = simulate(pid, args.step, args.fps, args.latency, args.rate, args.ppd)
+        overshoot, settle, final = step_metrics(trace, args.step, args.tolerance)
+        settle_text = f"{settle:5.2f} s" if settle is not None else "  não "
+        print(f"  kp={kp:4.2f} ki={ki:4.2f} kd={kd:4.2f}: sobreelevação {overshoot:5.1f} graus, "
+              f"estabiliza {settle_text}, erro final {final:+.0f} graus")
+
+if __name__ == "__main__":
+    main()
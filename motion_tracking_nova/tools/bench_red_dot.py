@@ -0,0 +1,90 @@
+# tools/bench_red_dot.py
+#
+# Compara o custo da deteção do laser. Primeiro só a máscara vermelha:
+#   - dois inRange + bitwise_or (caminho antigo)
+#   - LUT só no plano de hue + inRange de S/V + bitwise_and
+#   - conversão com R e B trocados + um inRange (_red_hsv, o atual)
+# com o número de píxeis diferentes do caminho antigo. Depois a deteção
+# completa na imagem toda (bbox antiga e locate_red_dot, que também calcula
+# o centroide e a confiança) e com a janela seguida (RedDotTracker).
+#
+# Uso: python tools/bench_red_dot.py [--iters N]
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.detection import RED_LOWER, RED_UPPER, RedDotTracker, _red_hsv, detect_red_dot  # noqa: E402
+
+HUE_LUT = np.zeros(256, np.uint8)
+HUE_LUT[:11] = 255
+HUE_LUT[170:181] = 255
+
+def mask_two_ranges(frame):
+    hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
+    mask1 = cv2.inRange(hsv, np.array([0, 120, 70]), np.array([10, 255, 255]))
+    mask2 = cv2.inRange(hsv, np.array([170, 120, 70]), np.array([180, 255, 255]))
+    return cv2.bitwise_or(mask1, mask2)
+
+def mask_hue_lut(frame):
+    hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
+    hue_mask = cv2.LUT(cv2.extractChannel(hsv, 0), HUE_LUT)
+    return cv2.bitwise_and(hue_mask, cv2.inRange(hsv, np.array([0, 120, 70]), np.array([255, 255, 255])))
+
+def mask_swapped(frame):
+    return cv2.inRange(_red_hsv(frame), RED_LOWER, RED_UPPER)
+
+def detect_red_dot_two_ranges(frame):
+    mask = mask_two_ranges(frame)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None, None
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    return x + w // 2, y + h // 2
+
+def make_frames(w, h, n):
+    # Fundo com ruído e um ponto vermelho que se move uns píxeis por frame
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 120, (h, w, 3), dtype=np.uint8)
+    frames = []
+    for i in range(n):
+        frame = background.copy()
+        cv2.circle(frame, (w // 3 + 2 * i % 40, h // 2 + i % 7), 4, (255, 30, 30), -1)
+        frames.append(frame)
+    return frames
+
+def time_per_frame(fn, frames):
+    fn(frames[0])
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    return (time.perf_counter() - start) / len(frames) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iters", type=int, default=200)
+    args = parser.parse_args()
+
+    for w, h in [(640, 480), (1280, 720)]:
+        frames = make_frames(w, h, args.iters)
+        tracker = RedDotTracker()
+        print(f"{w}x{h}")
+        reference = mask_two_ranges(frames[0])
+        for label, fn in (("2x inRange + or", mask_two_ranges),
+                          ("LUT de hue + and", mask_hue_lut),
+                          ("R/B trocados + inRange", mask_swapped)):
+            different = int(np.count_nonzero(fn(frames[0]) != reference))
+            print(f"  máscara {label:23s} : {time_per_frame(fn, frames):8.3f} ms ({different} píxeis diferentes)")
+        print(f"  deteção bbox (antiga)           : {time_per_frame(detect_red_dot_two_ranges, frames):8.3f} ms")
+        print(f"  locate_red_dot                  : {time_per_frame(detect_red_dot, frames):8.3f} ms")
+        print(f"  janela seguida (ROI)            : {time_per_frame(tracker.detect, frames):8.3f} ms "
+              f"({tracker.full_searches} pesquisas na imagem toda)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# tools/bench_serial.py
+#
+# Mede a latência de ida e volta (PING/PONG) e os comandos por segundo do
+# link série a cada baud rate negociável. Por omissão corre contra o
+# emulador do firmware num pty; com --port mede o Arduino real.
+#
+# Uso: python tools/bench_serial.py [--port /dev/ttyACM0] [--seconds 1]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.protocol import BAUD_RATES, FrameDecoder, encode_servo_xy  # noqa: E402
+from app.serial_link import negotiate_baudrate, ping  # noqa: E402
+from firmware_emulator import FirmwareEmulator  # noqa: E402
+
+def measure_rtt(ser, samples):
+    decoder = FrameDecoder()
+    rtts = []
+    for seq in range(samples):
+        start = time.perf_counter()
+        if ping(ser, seq, timeout=0.5, decoder=decoder):
+            rtts.append((time.perf_counter() - start) * 1000)
+    return rtts
+
+def servo_command(i):
+    return encode_servo_xy(i % 180, 90)
+
+def measure_command_rate(ser, seconds, batch=20, make_command=servo_command):
+    # Envia lotes de comandos seguidos de um PING: quando o PONG chega, todos
+    # os comandos do lote já foram processados pelo firmware. Os lotes evitam
+    # acumular um backlog maior que o buffer do link.
+    decoder = FrameDecoder()
+    sent = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        ser.write(b"".join(make_command(sent + i) for i in range(batch)))
+        sent += batch
+        if not ping(ser, sent, timeout=2, decoder=decoder):
+            print("Aviso: PONG perdido durante a medição")
+    return sent / (time.perf_counter() - start)
+
+def bench(port, seconds, samples):
+    print(f"{'baud':>8} {'RTT med (ms)':>13} {'RTT p95 (ms)':>13} {'cmd/s':>9}")
+    for rate in BAUD_RATES:
+        ser = serial.Serial(port, BAUD_RATES[0], timeout=0.1)
+        negotiated = negotiate_baudrate(ser, max_baudrate=rate)
+        if negotiated != rate:
+            print(f"{rate:>8} não suportado (ficou a {negotiated})")
+            ser.close()
+            continue
+        rtts = sorted(measure_rtt(ser, samples))
+        rate_cmds = measure_command_rate(ser, seconds)
+        p95 = rtts[int(len(rtts) * 0.95) - 1] if rtts else float("nan")
+        median = statistics.median(rtts) if rtts else float("nan")
+        print(f"{rate:>8} {median:>13.2f} {p95:>13.2f} {rate_cmds:>9.0f}")
+        # Ao reabrir a porta o Arduino reinicia (DTR) e volta à taxa base
+        ser.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", help="porta do Arduino; sem isto usa o emulador")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.port:
+        bench(args.port, args.seconds, args.samples)
+        return
+
+    with FirmwareEmulator() as emulator:
+        bench(emulator.port, args.seconds, args.samples)
+
+if __name__ == "__main__":
+    main()
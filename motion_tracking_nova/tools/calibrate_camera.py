@@ -0,0 +1,52 @@
+# tools/calibrate_camera.py
+#
+# Calibração intrínseca com um tabuleiro de xadrez. Captura frames da Pi
+# Camera até encontrar o tabuleiro em --views posições diferentes, calcula a
+# matriz da câmara e a distorção e grava o modelo usado por app/camera_model.py.
+#
+# Uso: python tools/calibrate_camera.py [--pattern 9x6] [--square 25] [--views 15]
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.camera import CameraManager  # noqa: E402
+from app.camera_model import DEFAULT_MODEL_PATH, calibrate_chessboard, find_chessboard  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pattern", default="9x6", help="cantos interiores, colunas x linhas")
+    parser.add_argument("--square", type=float, default=1.0, help="lado do quadrado (qualquer unidade)")
+    parser.add_argument("--views", type=int, default=15)
+    parser.add_argument("--interval", type=float, default=1.0, help="s entre capturas aceites")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args()
+
+    pattern = tuple(int(v) for v in args.pattern.lower().split("x"))
+    camera = CameraManager()
+    frames = []
+    last_capture = 0.0
+
+    print(f"A capturar {args.views} vistas do tabuleiro {pattern}; mude a posição entre capturas")
+    while len(frames) < args.views:
+        frame = camera.get_frame()
+        if frame is None or time.monotonic() - last_capture < args.interval:
+            continue
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if find_chessboard(gray, pattern) is not None:
+            frames.append(gray)
+            last_capture = time.monotonic()
+            print(f"  vista {len(frames)}/{args.views}")
+    camera.stop()
+
+    model, rms = calibrate_chessboard(frames, pattern, args.square)
+    model.save(args.output)
+    print(f"Erro RMS de reprojeção: {rms:.3f} px; modelo gravado em {args.output}")
+
+if __name__ == "__main__":
+    main()
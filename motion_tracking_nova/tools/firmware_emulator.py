@@ -0,0 +1,186 @@
+# tools/firmware_emulator.py
+#
+# Emulador do firmware (arduino/main.ino) sobre um pseudo-terminal, para
+# testar o lado Python do protocolo série sem o Arduino ligado.
+# A porta a abrir com pyserial é FirmwareEmulator.port.
+#
+# Um pty não tem baud rate real, por isso o emulador simula o tempo no fio
+# (10 bits por byte à taxa negociada) antes de processar ou enviar dados.
+#
+# step_delay/loop_delay permitem simular o firmware antigo, que bloqueava
+# com delay() em cada comando STEP e no fim de cada loop().
+#
+# SERVO_TARGET segue o mesmo perfil trapezoidal do firmware (stepProfile),
+# avançado a cada volta do loop; SERVO_X/Y/XY, CALIBRATE e um STEP com
+# movimento nesse eixo cancelam o perfil, como no Arduino.
+
+import os
+import select
+import sys
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.protocol import (  # noqa: E402
+    BAUD_RATES, FrameDecoder, OP_SERVO_X, OP_SERVO_Y, OP_SERVO_XY, OP_STEP,
+    OP_CALIBRATE, OP_PING, OP_HELLO, OP_SET_BAUD, OP_SERVO_TARGET, OP_PONG,
+    OP_CAPS, OP_ACK, baud_mask, decode_servo_target, decode_step, encode_frame,
+    encode_pos
+)
+
+PASSO = 0.5  # igual ao `passo` do firmware
+
+class FirmwareEmulator:
+    def __init__(self, feedback_interval=0.1, supported_baudrates=BAUD_RATES, simulate_wire_time=True,
+                 step_delay=0.0, loop_delay=0.0):
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self.feedback_interval = feedback_interval
+        self.supported_baudrates = supported_baudrates
+        self.simulate_wire_time = simulate_wire_time
+        self.step_delay = step_delay
+        self.loop_delay = loop_delay
+        self.baudrate = BAUD_RATES[0]
+        self.decoder = FrameDecoder()
+        self.pos = [90.0, 90.0]
+        # Perfil ativo por eixo: [alvo, v_max, a_max, velocidade] ou None
+        self.profiles = [None, None]
+        self.fired = 0
+        self.commands_received = 0
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _wire_delay(self, nbytes):
+        if self.simulate_wire_time:
+            time.sleep(nbytes * 10 / self.baudrate)
+
+    def write(self, data):
+        self._wire_delay(len(data))
+        os.write(self.master_fd, data)
+
+    def handle(self, opcode, payload):
+        with self.lock:
+            self.commands_received += 1
+            if opcode == OP_SERVO_X:
+                self.profiles[0] = None
+                self.pos[0] = min(180, payload[0])
+            elif opcode == OP_SERVO_Y:
+                self.profiles[1] = None
+                self.pos[1] = min(180, payload[0])
+            elif opcode == OP_SERVO_XY:
+                self.profiles = [None, None]
+                self.pos = [min(180, payload[0]), min(180, payload[1])]
+            elif opcode == OP_SERVO_TARGET:
+                axis, angle, max_velocity, max_accel = decode_servo_target(payload)
+                i = 1 if axis == 'y' else 0
+                # Mantém a velocidade atual se o alvo mudar a meio do movimento
+                velocity = self.profiles[i][3] if self.profiles[i] else 0.0
+                self.profiles[i] = [min(180, angle), max(1, max_velocity), max(1, max_accel), velocity]
+            elif opcode == OP_CALIBRATE:
+                self.profiles = [None, None]
+                self.pos = [100, 90]
+            elif opcode == OP_STEP:
+                signal_x, signal_y, fire = decode_step(payload)
+                if signal_x:
+                    self.profiles[0] = None
+                if signal_y:
+                    self.profiles[1] = None
+                if signal_x == 1:
+                    self.pos[0] = max(0, self.pos[0] - PASSO)
+                elif signal_x == 2:
+                    self.pos[0] = min(180, self.pos[0] + PASSO)
+                if signal_y == 1:
+                    self.pos[1] = min(180, self.pos[1] + PASSO)
+                elif signal_y == 2:
+                    self.pos[1] = max(0, self.pos[1] - PASSO)
+                self.fired += fire
+                if self.step_delay:
+                    time.sleep(self.step_delay)
+
+        if opcode == OP_PING:
+            self.write(encode_frame(OP_PONG, payload))
+        elif opcode == OP_HELLO:
+            self.write(encode_frame(OP_CAPS, (baud_mask(self.supported_baudrates),)))
+        elif opcode == OP_SET_BAUD and payload[0] < len(BAUD_RATES):
+            rate = BAUD_RATES[payload[0]]
+            if rate in self.supported_baudrates:
+                self.write(encode_frame(OP_ACK, payload))
+                self.baudrate = rate
+
+    def _step_profiles(self, dt):
+        # Igual ao stepProfile() do firmware
+        dt = min(dt, 0.05)
+        for i, profile in enumerate(self.profiles):
+            if profile is None:
+                continue
+            target, max_velocity, max_accel, velocity = profile
+            dist = target - self.pos[i]
+            direction = 1 if dist > 0 else -1
+            stop_dist = velocity * velocity / (2 * max_accel)
+            if velocity * direction > 0 and abs(dist) <= stop_dist:
+                velocity -= direction * max_accel * dt
+            else:
+                velocity += direction * max_accel * dt
+            velocity = max(-max_velocity, min(max_velocity, velocity))
+            position = self.pos[i] + velocity * dt
+            if (target - position) * direction <= 0 or abs(dist) < 0.05:
+                position = target
+                self.profiles[i] = None
+            else:
+                profile[3] = velocity
+            self.pos[i] = max(0, min(180, position))
+
+    def moving(self):
+        with self.lock:
+            return any(profile is not None for profile in self.profiles)
+
+    def _loop(self):
+        last_feedback = time.monotonic()
+        last_profile = last_feedback
+        while self.running:
+            readable, _, _ = select.select([self.master_fd], [], [], 0.005)
+            if readable:
+                try:
+                    data = os.read(self.master_fd, 4096)
+                except OSError:
+                    break
+                self._wire_delay(len(data))
+                for opcode, payload in self.decoder.feed(data):
+                    self.handle(opcode, payload)
+
+            if self.loop_delay:
+                time.sleep(self.loop_delay)
+
+            now = time.monotonic()
+            with self.lock:
+                self._step_profiles(now - last_profile)
+            last_profile = now
+
+            if now - last_feedback > self.feedback_interval:
+                with self.lock:
+                    x, y = self.pos
+                self.write(encode_pos(x, y))
+                last_feedback = now
@@ -0,0 +1,142 @@
+# tools/serial_loopback.py
+#
+# Teste de loopback do protocolo binário contra o emulador do firmware num
+# pseudo-terminal. Verifica cada comando, a rejeição de frames corrompidos e
+# o feedback POS, e compara bytes/tempo de parsing com o protocolo de texto.
+#
+# Uso: python tools/serial_loopback.py
+
+import os
+import sys
+import time
+
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.protocol import (  # noqa: E402
+    FrameDecoder, OP_POS, encode_servo, encode_servo_xy, encode_servo_target,
+    encode_step, encode_calibrate, encode_pos
+)
+from firmware_emulator import FirmwareEmulator  # noqa: E402
+
+failures = []
+
+def check(name, condition):
+    print(f"  [{'OK' if condition else 'FALHA'}] {name}")
+    if not condition:
+        failures.append(name)
+
+def send_and_wait(ser, emulator, data, expected_commands):
+    ser.write(data)
+    ser.flush()
+    deadline = time.monotonic() + 1.0
+    while emulator.commands_received < expected_commands and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+def wait_until_stopped(emulator, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while emulator.moving() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+def run_loopback():
+    print("Loopback contra o emulador:")
+    with FirmwareEmulator(feedback_interval=0.05) as emulator:
+        ser = serial.Serial(emulator.port, 9600, timeout=0.5)
+
+        send_and_wait(ser, emulator, encode_servo('x', 93), 1)
+        check("SERVO_X 93", emulator.pos[0] == 93)
+
+        send_and_wait(ser, emulator, encode_servo('y', 45), 2)
+        check("SERVO_Y 45", emulator.pos[1] == 45)
+
+        send_and_wait(ser, emulator, encode_servo_xy(10, 170), 3)
+        check("SERVO_XY 10,170", emulator.pos == [10, 170])
+
+        send_and_wait(ser, emulator, encode_calibrate(), 4)
+        check("CALIBRATE", emulator.pos == [100, 90])
+
+        send_and_wait(ser, emulator, encode_step(2, 0, 1), 5)
+        check("STEP x+ e disparo", emulator.pos[0] == 100.5 and emulator.fired == 1)
+
+        corrupted = bytearray(encode_servo('x', 0))
+        corrupted[-1] ^= 0xFF
+        send_and_wait(ser, emulator, bytes(corrupted) + encode_servo('x', 120), 6)
+        check("frame corrompido ignorado", emulator.pos[0] == 120 and emulator.decoder.crc_errors == 1)
+
+        send_and_wait(ser, emulator, encode_servo_target('y', 30, 120, 400), 7)
+        send_and_wait(ser, emulator, encode_servo_target('y', 90, 120, 400), 8)
+        wait_until_stopped(emulator)
+        check("SERVO_TARGET y 90", emulator.pos[1] == 90)
+
+        # Disparar a meio de um movimento não pode cancelar o perfil
+        send_and_wait(ser, emulator, encode_servo_target('x', 40, 120, 400) + encode_step(0, 0, 1), 10)
+        check("alvo e disparo: ainda em perfil", emulator.moving() and emulator.fired == 2)
+        wait_until_stopped(emulator)
+        check("alvo e disparo: chega ao alvo", emulator.pos[0] == 40)
+        send_and_wait(ser, emulator, encode_servo('x', 120), 11)
+
+        decoder = FrameDecoder()
+        ser.reset_input_buffer()
+        deadline = time.monotonic() + 1.0
+        positions = []
+        while not positions and time.monotonic() < deadline:
+            frames = decoder.feed(ser.read(ser.in_waiting or 1))
+            positions = [p for op, p in frames if op == OP_POS]
+        check("feedback POS", bool(positions) and tuple(positions[-1]) == (120, 90))
+
+        ser.close()
+
+def parse_text(line):
+    line = line.decode().strip()
+    if line.startswith("SERVOX:") or line.startswith("SERVOY:"):
+        return int(line[7:])
+    if line.startswith("POS:"):
+        _, x, y = line.split(":")
+        return int(x), int(y)
+    return None
+
+def compare_with_text(iters=20000):
+    print("Comparação com o protocolo de texto:")
+    cases = [
+        ("servo X", b"SERVOX:93\n", encode_servo('x', 93)),
+        ("servo X+Y", b"SERVOX:93\nSERVOY:90\n", encode_servo_xy(93, 90)),
+        ("step", b"[1,0,0]\n", encode_step(1, 0, 0)),
+        ("POS", b"POS:93:90\r\n", encode_pos(93, 90)),
+    ]
+    for name, text, binary in cases:
+        print(f"  {name:10s}: {len(text):3d} bytes texto, {len(binary):3d} bytes binário "
+              f"({len(text) / len(binary):.1f}x)")
+
+    text_lines = [b"POS:93:90\r\n"] * iters
+    start = time.perf_counter()
+    for line in text_lines:
+        parse_text(line)
+    text_us = (time.perf_counter() - start) / iters * 1e6
+
+    # Um frame por leitura (o caso normal com feedback a 20 Hz) e tudo de uma vez
+    decoder = FrameDecoder()
+    frame = encode_pos(93, 90)
+    start = time.perf_counter()
+    for _ in range(iters):
+        decoder.feed(frame)
+    single_us = (time.perf_counter() - start) / iters * 1e6
+
+    decoder = FrameDecoder()
+    data = frame * iters
+    start = time.perf_counter()
+    decoder.feed(data)
+    bulk_us = (time.perf_counter() - start) / iters * 1e6
+    print(f"  parsing POS no host: texto {text_us:.2f} us/frame, binário {single_us:.2f} us/frame "
+          f"(um por leitura), {bulk_us:.2f} us/frame (em bloco)")
+
+def main():
+    run_loopback()
+    compare_with_text()
+    if failures:
+        print(f"{len(failures)} verificação(ões) falharam")
+        sys.exit(1)
+    print("Tudo OK")
+
+if __name__ == "__main__":
+    main()